@@ -2,46 +2,57 @@ from vpython import *
 from time import *
 from RubiksCubeUtil import *
 from RubiksCube import *
+from RubiksCubeRender import getDisplaySpecs, animationSpecs
+from functools import partial
 import math
 
 class DisplayRubiksCube:
-    # Parameters
-    _thin = 0.1
+    # Parameters--the sizes and places of the squares are in RubiksCubeRender
     _steps = 10
-    _renderTime = 0.02
+    _frameRate = 50
     _pauseTime = 0.5
     
     # Calculated from parameters
     _smallestAngle = math.pi/2/_steps
     
+    # Multiplies the animation speed (see setSpeed)
+    _speed = 1
+    
     # State variables
     _cube = None
-    _boxes = [[[None for _ in range(3)] for _ in range(3)] for _ in range(6)]
+    # Where the cube's center is, and the vpython canvas it's drawn in (see RubiksCubeDashboard for many cubes in one)
+    _offset = None
+    _canvas = None
+    # The box showing each square, in the flat order given by getIndex
+    _boxes = None
+    # Animation function for each Action
+    _animations = None
+    # The move being animated, while it is (see startAction): (action, compound of the turning boxes, frames left)
+    _animation = None
     
-    def __init__(self, cube):
+    def __init__(self, cube, attach = True, offset = (0, 0, 0), canvas = None):
+        # If attach is True, each move performed on cube is animated as it's done--the move waits for its animation
+        # Otherwise the display just shows cube's state, and moves are animated with animateAction (see RubiksCubePlayer)
+        # offset is where the cube's center is drawn, and canvas is the vpython canvas to draw in (the default scene if None)
         self._cube = cube
+        self._offset = vector(*offset)
+        self._canvas = canvas if canvas != None else scene
+        self._boxes = [None] * 54
         self.setDisplay()
         
-        addOnFunctions = {
-            Action.TCW : self.turnClockwise,
-            Action.TCCW : self.turnCounterClockwise,
-            Action.TF : self.turnForward,
-            Action.TB : self.turnBackward,
-            Action.U : self.moveU,
-            Action.D : self.moveD,
-            Action.R : self.moveR,
-            Action.L : self.moveL,
-            Action.F : self.moveF,
-            Action.B : self.moveB,
-            Action.UP : self.moveUP,
-            Action.DP : self.moveDP,
-            Action.RP : self.moveRP,
-            Action.LP : self.moveLP,
-            Action.FP : self.moveFP,
-            Action.BP : self.moveBP
-        }
-        cube.setAddOns(addOnFunctions)
-        
+        self._animations = {action : partial(self.animateAction, action) for action in Action}
+        if attach:
+            cube.setAddOns(self._animations)
+    
+    def showState(self, compactState):
+        # Shows the given compact state straight away, without animating
+        self._cube = RubiksCube(compactState, recordMoves = False)
+        self.setDisplay()
+    
+    def setSpeed(self, speed):
+        # speed multiplies the animation speed--2 plays twice as fast
+        self._speed = speed
+    
     def setDisplay(self):
         rubiksColorToVector = {
             RubiksColor.BLUE : color.blue,
@@ -58,238 +69,68 @@ class DisplayRubiksCube:
             for row in range(3):
                 for col in range(3):
                     square = state[face.value][row][col]
-                    (length, height, width, x, y, z) = DisplayRubiksCube.getDisplaySpecs(face, row, col)
-                    if (self._boxes[face.value][row][col] == None):
-                        self._boxes[face.value][row][col] = box(color = rubiksColorToVector[square], length = length, height = height, width = width, pos = vector(x, y, z))
+                    (length, height, width, x, y, z) = getDisplaySpecs(face, row, col)
+                    index = getIndex(face, row, col)
+                    if (self._boxes[index] == None):
+                        self._boxes[index] = box(canvas = self._canvas, color = rubiksColorToVector[square], length = length, height = height, width = width, pos = vector(x, y, z) + self._offset)
                     else:
-                        self._boxes[face.value][row][col].color = rubiksColorToVector[square]
-                        self._boxes[face.value][row][col].length = length
-                        self._boxes[face.value][row][col].height = height
-                        self._boxes[face.value][row][col].width = width
-                        self._boxes[face.value][row][col].pos = (x, y, z)
-                
-                
-    # Helper function for setDisplay
+                        self._boxes[index].color = rubiksColorToVector[square]
+                        self._boxes[index].pos = vector(x, y, z) + self._offset
+                        # Undo any turns from animations
+                        self._boxes[index].axis = vector(length, 0, 0)
+                        self._boxes[index].up = vector(0, 1, 0)
+                        self._boxes[index].length = length
+                        self._boxes[index].height = height
+                        self._boxes[index].width = width
     
-    def getDisplaySpecs(face, row, col):
-        # Given cube coordinates, returns tuple consisting of: (length, height, width, x, y, z)
-        
-        if face == Faces.TOP:
-            return (1, 1, DisplayRubiksCube._thin, col - 1, -(row - 1), 1.5)
-        if face == Faces.FRONT:
-            return (1, DisplayRubiksCube._thin, 1, col - 1, -1.5, -(row - 1))
-        if face == Faces.RIGHT:
-            return (DisplayRubiksCube._thin, 1, 1, 1.5, col - 1, -(row - 1))
-        if face == Faces.BACK:
-            return (1, DisplayRubiksCube._thin, 1, -(col - 1), 1.5, -(row - 1))
-        if face == Faces.LEFT:
-            return (DisplayRubiksCube._thin, 1, 1, -1.5, -(col - 1), -(row - 1))
-        if face == Faces.BOTTOM:
-            return (1, 1, DisplayRubiksCube._thin, col - 1, (row - 1), -1.5)
-        
-        
-    # General functions for animation, adjusting boxes array
-    def animate(self, axis, points):
-        # Animate each point in points[] rotating 90 degrees around axis
-        
-        rotation = self._smallestAngle
-        while rotation <= math.pi/2:
-            sleep(self._renderTime)
-            for (face, row, col) in points:
-                # Revolve and rotate
-                self._boxes[face.value][row][col].pos = rotate(self._boxes[face.value][row][col].pos, angle = self._smallestAngle, axis = axis)
-                self._boxes[face.value][row][col].rotate(angle = self._smallestAngle, axis = axis)
-            rotation += self._smallestAngle
-        sleep(self._pauseTime)
-        
-    def adjustBoxes(self, action):
-        # Adjust the _boxes array based on the transformations for the given action
-        transformations = RubiksCube.getTransformations(action)
-        newBoxes = stateCopy(self._boxes)
-        
-        for origin, destination, points, mapping in transformations:
-            if mapping == None:
-                mapping = getOrientationMapping(origin, destination)
-            for point in points:
-                coordsOfMappedPoint = mapping[point]
-                newBoxes[destination.value][point[0]][point[1]] = self._boxes[origin.value][coordsOfMappedPoint[0]][coordsOfMappedPoint[1]]
-        
-        self._boxes = newBoxes
-        
-        
-    # Turn functions
-        
-    def turnClockwise(self):
-        # Do an animation of a full cube clockwise rotation
-        
-        points = [(face, r, c) for (r, c) in getAllPoints() for face in Faces]
-        self.animate(vector(0, 0, -1), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.TCW)
-        
-    def turnCounterClockwise(self):
-        # Do an animation of a full cube counterclockwise rotation
-        
-        points = [(face, r, c) for (r, c) in getAllPoints() for face in Faces]
-        self.animate(vector(0, 0, 1), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.TCCW)
-        
-    def turnForward(self):
-        # Do an animation of a full cube forward rotation
-        
-        points = [(face, r, c) for (r, c) in getAllPoints() for face in Faces]
-        self.animate(vector(-1, 0, 0), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.TF)
-        
-    def turnBackward(self):
-        # Do an animation of a full cube forward rotation
-        
-        points = [(face, r, c) for (r, c) in getAllPoints() for face in Faces]
-        self.animate(vector(1, 0, 0), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.TB)
-        
     
-    # Move functions
+    # Animation
     
-    def moveU(self):
-        # Do an animation of a U move
-        
-        points = [(Faces.TOP, r, c) for (r, c) in getAllPoints()]
-        points.extend([(face, r, c) for (r, c) in getPointsInRow(0) for face in [Faces.FRONT, Faces.RIGHT, Faces.BACK, Faces.LEFT]])
-        self.animate(vector(0, 0, -1), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.U)
+    def animateAction(self, action):
+        # Animates one action, without performing it on the cube
+        # Frames are paced with rate, so faster speeds just mean more frames a second
+        
+        self.startAction(action)
+        while self.stepAction():
+            rate(self._frameRate * self._speed)
+        sleep(self._pauseTime / self._speed)
     
-    def moveUP(self):
-        # Do an animation of a UP move
-        
-        points = [(Faces.TOP, r, c) for (r, c) in getAllPoints()]
-        points.extend([(face, r, c) for (r, c) in getPointsInRow(0) for face in [Faces.FRONT, Faces.RIGHT, Faces.BACK, Faces.LEFT]])
-        self.animate(vector(0, 0, 1), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.UP)
+    # The steps of animateAction, for animating many displays on one clock (see RubiksCubeDashboard)
     
-    def moveD(self):
-        # Do an animation of a D move
-        
-        points = [(Faces.BOTTOM, r, c) for (r, c) in getAllPoints()]
-        points.extend([(face, r, c) for (r, c) in getPointsInRow(2) for face in [Faces.FRONT, Faces.RIGHT, Faces.BACK, Faces.LEFT]])
-        self.animate(vector(0, 0, 1), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.D)
+    def startAction(self, action):
+        # Starts animating action: the boxes that turn (see animationSpecs) are grouped into one compound object,
+        # which stepAction turns once a frame
+        (axis, indices, quarterTurns) = animationSpecs[action]
+        boxes = [self._boxes[index] for index in indices]
+        layer = compound(boxes)
+        for square in boxes:
+            square.visible = False
+        self._animation = (action, layer, quarterTurns * self._steps)
     
-    def moveDP(self):
-        # Do an animation of a DP move
-        
-        points = [(Faces.BOTTOM, r, c) for (r, c) in getAllPoints()]
-        points.extend([(face, r, c) for (r, c) in getPointsInRow(2) for face in [Faces.FRONT, Faces.RIGHT, Faces.BACK, Faces.LEFT]])
-        self.animate(vector(0, 0, -1), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.DP)
-        
-    def moveR(self):
-        # Do an animation of a R move
-        
-        points = [(Faces.RIGHT, r, c) for (r, c) in getAllPoints()]
-        points.extend([(face, r, c) for (r, c) in getPointsInCol(2) for face in [Faces.FRONT, Faces.TOP, Faces.BOTTOM]])
-        points.extend([(Faces.BACK, r, c) for (r, c) in getPointsInCol(0)])
-        self.animate(vector(-1, 0, 0), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.R)
-        
-    def moveRP(self):
-        # Do an animation of a RP move
-        
-        points = [(Faces.RIGHT, r, c) for (r, c) in getAllPoints()]
-        points.extend([(face, r, c) for (r, c) in getPointsInCol(2) for face in [Faces.FRONT, Faces.TOP, Faces.BOTTOM]])
-        points.extend([(Faces.BACK, r, c) for (r, c) in getPointsInCol(0)])
-        self.animate(vector(1, 0, 0), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.RP)
-        
-    def moveL(self):
-        # Do an animation of a L move
-        
-        points = [(Faces.LEFT, r, c) for (r, c) in getAllPoints()]
-        points.extend([(face, r, c) for (r, c) in getPointsInCol(0) for face in [Faces.FRONT, Faces.TOP, Faces.BOTTOM]])
-        points.extend([(Faces.BACK, r, c) for (r, c) in getPointsInCol(2)])
-        self.animate(vector(1, 0, 0), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.L)
-        
-    def moveLP(self):
-        # Do an animation of a LP move
-        
-        points = [(Faces.LEFT, r, c) for (r, c) in getAllPoints()]
-        points.extend([(face, r, c) for (r, c) in getPointsInCol(0) for face in [Faces.FRONT, Faces.TOP, Faces.BOTTOM]])
-        points.extend([(Faces.BACK, r, c) for (r, c) in getPointsInCol(2)])
-        self.animate(vector(-1, 0, 0), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.LP)
-        
-    def moveF(self):
-        # Do an animation of a F move
-        
-        points = [(Faces.FRONT, r, c) for (r, c) in getAllPoints()]
-        points.extend([(Faces.TOP, r, c) for (r, c) in getPointsInRow(2)])
-        points.extend([(Faces.RIGHT, r, c) for (r, c) in getPointsInCol(0)])
-        points.extend([(Faces.BOTTOM, r, c) for (r, c) in getPointsInRow(0)])
-        points.extend([(Faces.LEFT, r, c) for (r, c) in getPointsInCol(2)])
-        self.animate(vector(0, 1, 0), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.F)
-        
-    def moveFP(self):
-        # Do an animation of a FP move
-        
-        points = [(Faces.FRONT, r, c) for (r, c) in getAllPoints()]
-        points.extend([(Faces.TOP, r, c) for (r, c) in getPointsInRow(2)])
-        points.extend([(Faces.RIGHT, r, c) for (r, c) in getPointsInCol(0)])
-        points.extend([(Faces.BOTTOM, r, c) for (r, c) in getPointsInRow(0)])
-        points.extend([(Faces.LEFT, r, c) for (r, c) in getPointsInCol(2)])
-        self.animate(vector(0, -1, 0), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.FP)
-        
-    def moveB(self):
-        # Do an animation of a B move
-        
-        points = [(Faces.BACK, r, c) for (r, c) in getAllPoints()]
-        points.extend([(Faces.TOP, r, c) for (r, c) in getPointsInRow(0)])
-        points.extend([(Faces.RIGHT, r, c) for (r, c) in getPointsInCol(2)])
-        points.extend([(Faces.BOTTOM, r, c) for (r, c) in getPointsInRow(2)])
-        points.extend([(Faces.LEFT, r, c) for (r, c) in getPointsInCol(0)])
-        self.animate(vector(0, -1, 0), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.B)
-        
-    def moveBP(self):
-        # Do an animation of a BP move
-        
-        points = [(Faces.BACK, r, c) for (r, c) in getAllPoints()]
-        points.extend([(Faces.TOP, r, c) for (r, c) in getPointsInRow(0)])
-        points.extend([(Faces.RIGHT, r, c) for (r, c) in getPointsInCol(2)])
-        points.extend([(Faces.BOTTOM, r, c) for (r, c) in getPointsInRow(2)])
-        points.extend([(Faces.LEFT, r, c) for (r, c) in getPointsInCol(0)])
-        self.animate(vector(0, 1, 0), points)
-        
-        # Adjust _boxes array so that they represent the correct box
-        self.adjustBoxes(Action.BP)
+    def stepAction(self):
+        # Turns the move being animated by one frame--returns False once it's finished (or if there's none)
+        if self._animation == None:
+            return False
+        (action, layer, framesLeft) = self._animation
+        if framesLeft == 0:
+            self.finishAction()
+            return False
+        layer.rotate(angle = self._smallestAngle, axis = vector(*animationSpecs[action][0]), origin = self._offset)
+        self._animation = (action, layer, framesLeft - 1)
+        return True
+    
+    def finishAction(self):
+        # Puts the boxes where the compound object ended up, and drops it
+        (action, layer, framesLeft) = self._animation
+        (axis, indices, quarterTurns) = animationSpecs[action]
+        for index in indices:
+            self._boxes[index].rotate(angle = quarterTurns * math.pi/2, axis = vector(*axis), origin = self._offset)
+            self._boxes[index].visible = True
+        layer.visible = False
+        self._animation = None
+        
+        # Each box is now showing the square the action moved it to
+        self._boxes = list(actionGathers[action](self._boxes))
+    
+    def isAnimating(self):
+        return self._animation != None
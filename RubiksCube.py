@@ -10,6 +10,20 @@
 
 from RubiksCubeUtil import *
 from time import *
+from operator import itemgetter
+from collections import deque, OrderedDict
+from RubiksCubeCubies import getPieceIndex, findPieceSquare, compactToCubies, cubiesToCompact, validateCompactState
+import RubiksCubeTwoPhase
+
+class SolveBudgetExceeded(Exception):
+    # Raised by solve when a limit set with RubiksCube.setSolveBudget runs out
+    # stage is the step of the solve it got to, limit is the limit that ran out ('nodes', 'seconds', or 'moves'),
+    # and used is how much of that limit had been used
+    def __init__(self, stage, limit, used):
+        super().__init__("The solve ran out of %s during the %s stage (%s used)" % (limit, stage, used))
+        self.stage = stage
+        self.limit = limit
+        self.used = used
 
 class RubiksCube:
     
@@ -23,57 +37,234 @@ class RubiksCube:
         The front is the reference point for all face orientations
             The top, bottom, right, and left are all oriented by moving one 90-degree rotation from the front
             The back is oriented by rotating from the front to the right face and then to the back
+    Stored internally as a compact state (54 bytes of color codes, see stateToCompact)
+        getState and setState use the format above; getCompactState and setCompactState use the compact one
     '''
-    _state = [[[]]]
+    _state = b''
+    
+    # Index of the pieces by color, to find them without searching the squares (see getPieceIndex in RubiksCubeCubies)
+    # _pieces is None if two pieces have the same colors--then findEdge and findCorner search the squares
+    # _piecePositions is updated by performAction along with _state
+    _pieces = None
+    _piecePositions = None
     
     # a dictionary mapping an Action Enum to a function pointer
     # used by display class to add animations
-    _addonFunctions = {}
+    _addonFunctions = None
+    
+    # the moves performed on this cube (oldest first), e.g. to solve it--see getMoveHistory
+    # a deque, which drops the oldest moves once it holds maxHistory moves
+    _movesPerformed = None
+    _recordMoves = True
+    
+    # If _virtualRotations is True, whole-cube turns only change which way the cube is being looked at--see setVirtualRotations
+    # _state is then the cube as really held, and _orientation is the view, as a key of orientations:
+    # (face the top is really on, face the front is really on)
+    # _view is None while the cube is seen as held, otherwise the view's entry of orientationViews
+    _virtualRotations = False
+    _orientation = (Faces.TOP, Faces.FRONT)
+    _view = None
     
-    # a list of moves to solve the cube
-    _movesPerformed = []
+    # how incrementLookahead searches--one of searchModes
+        # 'depth': iterative-deepening depth-first search, one state at a time
+        # 'frontier': breadth-first search a whole depth at a time with NumPy (see RubiksCubeArray.frontierSearch)
+    _searchMode = 'depth'
     
-    def __init__(self, state = None):
+    # Moves found by incrementLookahead, shared by all cubes (see setLookaheadCacheSize)
+    # An OrderedDict from search key to (the tuple of actions found, or None if there were none; the search nodes it took,
+    # or None if they weren't counted)--least recently used first
+    _lookaheadCache = OrderedDict()
+    _lookaheadCacheSize = 10000
+    _lookaheadCacheHits = 0
+    _lookaheadCacheMisses = 0
+    
+    # Limits on the work of one solve (see setSolveBudget)--None means no limit
+    _maxSearchNodes = None
+    _maxSolveSeconds = None
+    _maxSolveMoves = None
+    # What the running solve has used, while _budgeted is True (only during solve)
+    _budgeted = False
+    _solveStage = None
+    _searchNodesUsed = 0
+    _solveMovesUsed = 0
+    _solveStart = 0
+    
+    def __init__(self, state = None, recordMoves = True, maxHistory = None):
+        # state can be a Color[3][3][6] or a compact state
+        # If recordMoves is False, performed moves are not kept (e.g. for a temporary copy used in a search)
+        # If maxHistory is given, only the most recent maxHistory moves are kept
         if state == None:
-            self._state = stateDefault()
+            self._state = stateToCompact(stateDefault())
+        elif isinstance(state, (bytes, bytearray)):
+            self._state = bytes(state)
         else:
-            self._state = stateCopy(state)
+            self._state = stateToCompact(state)
+        self.indexPieces()
+        
+        self._addonFunctions = {}
+        self._movesPerformed = deque(maxlen = maxHistory)
+        self._recordMoves = recordMoves
         
     def setAddOns(self, addonFunctions : dict):
         self._addonFunctions = addonFunctions
     
+    def createDisplay(self, attach = True):
+        # Creates a DisplayRubiksCube that shows this cube--if attach is True, it animates each move as it's performed
+        # With attach False, moves can be replayed on it afterwards without holding up the solver (see RubiksCubePlayer)
+        # The display (and vpython) is only imported here, so solving without a display doesn't need vpython
+        from DisplayRubiksCube import DisplayRubiksCube
+        return DisplayRubiksCube(self, attach)
+    
+    def setSearchMode(self, searchMode):
+        # searchMode is one of searchModes (see _searchMode)
+        if searchMode not in searchModes:
+            raise ValueError("Unknown search mode: %s" % searchMode)
+        self._searchMode = searchMode
+    
+    def setVirtualRotations(self, virtualRotations):
+        # With virtual rotations, whole-cube turns only change the orientation the cube is seen from--the squares aren't moved,
+        # and the turn isn't recorded or passed to add-ons
+        # Face moves are done, recorded, and passed to add-ons as the move of the face they really turn, with the cube held
+        # as it was before any turns
+        # The state seen by getState, getSquare, and the solver is still turned, so the solver works the same either way
+        # For a robot that can't turn the whole cube--the move history is then only face moves
+        # Turning them off keeps the cube as seen, which is then how it's held
+        if not virtualRotations and self._view != None:
+            self._state = self.getCompactState()
+            self.setOrientation((Faces.TOP, Faces.FRONT))
+            self.indexPieces()
+        self._virtualRotations = virtualRotations
+    
+    def setOrientation(self, orientation):
+        # Sets the orientation the cube is seen from (see _orientation), without moving any squares
+        self._orientation = orientation
+        self._view = orientationViews[orientation] if orientation != (Faces.TOP, Faces.FRONT) else None
+    
+    def setSolveBudget(self, maxSearchNodes = None, maxSeconds = None, maxMoves = None):
+        # Limits each solve to maxSearchNodes states looked at by its lookaheads, maxSeconds of wall-clock time,
+        # and maxMoves moves performed (whole-cube turns included)--None means no limit, the default for all three
+        # When one runs out, solve raises SolveBudgetExceeded, with the cube left where it got to
+        # Searches that come from the lookahead cache count the nodes they took, so the count is the same whether or not they were cached
+        self._maxSearchNodes = maxSearchNodes
+        self._maxSolveSeconds = maxSeconds
+        self._maxSolveMoves = maxMoves
+    
+    def getPhysicalCompactState(self):
+        # Returns the compact state of the cube as it's really held, without any virtual turns
+        return self._state
+    
+    # Move history
+    
+    def setRecordMoves(self, recordMoves):
+        self._recordMoves = recordMoves
+    
+    def setMaxHistory(self, maxHistory):
+        # Bounds the move history to the most recent maxHistory moves (None for unbounded)
+        self._movesPerformed = deque(self._movesPerformed, maxlen = maxHistory)
+    
+    def getMoveHistory(self):
+        # Returns a list of the recorded moves, oldest first
+        return list(self._movesPerformed)
+    
+    def clearMoveHistory(self):
+        self._movesPerformed.clear()
+    
+    def exportMoveHistory(self):
+        # Returns a list of the recorded moves, oldest first, and clears the history
+        moves = list(self._movesPerformed)
+        self._movesPerformed.clear()
+        return moves
+    
+    def optimizeMoveHistory(self, verbose = False):
+        # Shortens the move history by merging moves of the same and opposite faces (see RubiksCubeOptimizer)
+        # The shortened moves do exactly what the recorded ones did
+        # Returns (number of moves before, number after), and prints them if verbose
+        from RubiksCubeOptimizer import optimizeMoves
+        moves = list(self._movesPerformed)
+        optimized = optimizeMoves(moves)
+        self._movesPerformed = deque(optimized, maxlen = self._movesPerformed.maxlen)
+        if verbose:
+            print("Optimized %d moves to %d" % (len(moves), len(optimized)))
+        return (len(moves), len(optimized))
+    
     def setState(self, state):
         # state should be a Color[3][3][6]
-        self._state = stateCopy(state)
+        # The cube is then held as given, dropping any virtual turns (as for setCompactState)
+        self.setCompactState(stateToCompact(state))
                     
     def getState(self):
-        return stateCopy(self._state)
+        return compactToState(self.getCompactState())
+    
+    def setCompactState(self, compactState):
+        self._state = bytes(compactState)
+        self.setOrientation((Faces.TOP, Faces.FRONT))
+        self.indexPieces()
+    
+    def getCompactState(self):
+        # The cube as seen--with virtual turns, one gather of the squares as held
+        if self._view == None:
+            return self._state
+        return bytes(self._view[1](self._state))
+    
+    def setCubies(self, cubies):
+        # Sets the state from a CubieCube (see RubiksCubeCubies), keeping the current center colors
+        centers = self.getCompactState()
+        self.setCompactState(cubiesToCompact(cubies, [centers[getIndex(face, 1, 1)] for face in Faces]))
+    
+    def getCubies(self):
+        # Returns the state as a CubieCube, or None if it isn't made of real pieces (see compactToCubies)
+        return compactToCubies(self.getCompactState())
+    
+    def indexPieces(self):
+        # Rebuilds the piece index from _state
+        (self._pieces, self._piecePositions) = getPieceIndex(self._state)
+    
+    def getSquare(self, face, row, col):
+        # Returns the color of a single square, as seen
+        if self._view == None:
+            return colorsByCode[self._state[getIndex(face, row, col)]]
+        return colorsByCode[self._state[self._view[0][getIndex(face, row, col)]]]
     
     
     # General function for transforming cube state
     
     def transform(self, transformations):
         # Performs a given list of transformations--changes _state
+        # Reference implementation--performAction uses the precompiled permutations instead
         
-        newState = stateCopy(self._state)
+        state = self.getState()
+        newState = stateCopy(state)
         
         for origin, destination, points, mapping in transformations:
             if mapping == None:
                 mapping = getOrientationMapping(origin, destination)
             for point in points:
                 coordsOfMappedPoint = mapping[point]
-                newState[destination.value][point[0]][point[1]] = self._state[origin.value][coordsOfMappedPoint[0]][coordsOfMappedPoint[1]]
+                newState[destination.value][point[0]][point[1]] = state[origin.value][coordsOfMappedPoint[0]][coordsOfMappedPoint[1]]
                 
-        self._state = newState
+        self.setState(newState)
     
     
     # Functions to handle moves
     
     def performAction(self, action):
-        # Get and perform transformations corresponding to an action from Action Enum
+        # Perform the precompiled permutation corresponding to an action from Action Enum
+        # Equivalent to self.transform(RubiksCube.getTransformations(action))
+        
+        if self._budgeted:
+            self.chargeMove()
+        if self._virtualRotations:
+            # A whole-cube turn only changes the view, and a face move is done to the face it really turns
+            if action in turnActions:
+                self.setOrientation(orientationTurns[(self._orientation, action)])
+                return
+            action = orientationActions[(self._orientation, action)]
+        self._state = bytes(actionGathers[action](self._state))
+        if self._pieces != None:
+            self._piecePositions = tuple(map(actionDestinations[action].__getitem__, self._piecePositions))
         
-        self.transform(RubiksCube.getTransformations(action))
-        self._movesPerformed.append(action)
+        if self._recordMoves:
+            self._movesPerformed.append(action)
         
         # If an add-on command is available for this action, do it
         # This allows the display class to attach its animation functions
@@ -268,20 +459,67 @@ class RubiksCube:
                 transformations.append((Faces.BOTTOM, Faces.LEFT, getPointsInCol(0), None))
                 
                 return transformations
+            
+            case Action.U2 | Action.D2 | Action.R2 | Action.L2 | Action.F2 | Action.B2:
+                # The clockwise move done twice
+                return RubiksCube.getDoubledTransformations(RubiksCube.getTransformations(halfTurnActions[action]))
+    
+    # Static helper function for getTransformations
+    def getDoubledTransformations(transformations):
+        # Given the transformations of a move, returns transformations that do the move twice
+        # Squares can go to the opposite face, so every mapping is given
+        
+        # origins[(destination face, point)] = (origin face, origin point) for one move
+        origins = {}
+        for origin, destination, points, mapping in transformations:
+            if mapping == None:
+                mapping = getOrientationMapping(origin, destination)
+            for point in points:
+                origins[(destination, point)] = (origin, mapping[point])
+        
+        # Follow each square back through both moves, and group the points by origin and destination face
+        mappings = {}
+        for (destination, point), (origin, originPoint) in origins.items():
+            (origin, originPoint) = origins.get((origin, originPoint), (origin, originPoint))
+            mappings.setdefault((origin, destination), {})[point] = originPoint
+        
+        return [(origin, destination, list(mapping.keys()), mapping) for (origin, destination), mapping in mappings.items()]
         
 
     # Solver function
     
-    def solve(self):
+    def solve(self, verbose = True):
         # Returns true if solved correctly, false if impossible
+        # Prints when solved, or what's wrong with the cube if it can't be solved, unless verbose is False
+        # Raises SolveBudgetExceeded if the solve uses up its budget (see setSolveBudget)
+        
+        self.clearMoveHistory()
+        problem = self.validate()
+        if problem != None:
+            if verbose:
+                print(problem)
+            return False
+        
+        self.startSolveBudget()
+        try:
+            solved = self.solveLayers()
+        finally:
+            self._budgeted = False
+        if solved and verbose:
+            print("Solved!")
+        return solved
+    
+    def solveLayers(self):
+        # The steps of solve, a layer at a time from the white face--returns true if solved correctly
         
-        self._movesPerformed = []
         desiredState = stateDefault() # Building up state as we go on--starts at all default (no requirements)
         
         # 1: Orient cube
+        self.setSolveStage("orient")
         self.orientCube(desiredStatePointer = desiredState)
             
         # 2: White cross
+        self.setSolveStage("white cross")
         # white/blue edge
         desiredState[Faces.TOP.value][2][1] = RubiksColor.WHITE
         desiredState[Faces.FRONT.value][0][1] = RubiksColor.BLUE
@@ -321,12 +559,14 @@ class RubiksCube:
             self.incrementLookahead(1, 4, desiredState)
         
         # 3: White face
+        self.setSolveStage("white corners")
         self.doWhiteCorner(desiredState, RubiksColor.BLUE, RubiksColor.RED)
         self.doWhiteCorner(desiredState, RubiksColor.ORANGE, RubiksColor.BLUE)
         self.doWhiteCorner(desiredState, RubiksColor.RED, RubiksColor.GREEN)
         self.doWhiteCorner(desiredState, RubiksColor.GREEN, RubiksColor.ORANGE)
         
         # 4: Middle row edges
+        self.setSolveStage("middle edges")
         # Flip upside down--desiredState not accurate
         self.orientCube(upsideDown = True)
         self.orientState(desiredState, upsideDown = True)
@@ -339,6 +579,7 @@ class RubiksCube:
         # Cube is flipped upside down
         
         # 5: Yellow cross
+        self.setSolveStage("yellow cross")
         self.orientCube(upsideDown = True)
         self.orientState(desiredState, upsideDown = True)
         
@@ -346,17 +587,18 @@ class RubiksCube:
         desiredState[Faces.TOP.value][1][0] = RubiksColor.YELLOW
         desiredState[Faces.TOP.value][1][2] = RubiksColor.YELLOW
         desiredState[Faces.TOP.value][2][1] = RubiksColor.YELLOW
-        topFace = self._state[Faces.TOP.value]
-        if self.isDesiredState(desiredState):
-            pass
-        elif RubiksColor.YELLOW not in [topFace[0][1], topFace[1][0], topFace[1][2], topFace[2][1]]:
-            # No yellow edges
+        topFace = self.getState()[Faces.TOP.value]
+        if RubiksColor.YELLOW not in [topFace[0][1], topFace[1][0], topFace[1][2], topFace[2][1]]:
+            # No yellow edges--this leaves two, handled below
             self.performAction(Action.F)
             self.performAction(Action.U)
             self.performAction(Action.R)
             self.performAction(Action.UP)
             self.performAction(Action.RP)
             self.performAction(Action.FP)
+            topFace = self.getState()[Faces.TOP.value]
+        if self.isDesiredState(desiredState):
+            pass
         elif (topFace[0][1] == RubiksColor.YELLOW and topFace[2][1] == RubiksColor.YELLOW) or (topFace[1][0] == RubiksColor.YELLOW and topFace[1][2] == RubiksColor.YELLOW):
             # Straight line of yellow edges across
             if topFace[0][1] == RubiksColor.YELLOW and topFace[2][1] == RubiksColor.YELLOW:
@@ -371,7 +613,7 @@ class RubiksCube:
             # Yellow L
             while not (topFace[0][1] == RubiksColor.YELLOW and topFace[1][0] == RubiksColor.YELLOW):
                 self.performAction(Action.U)
-                topFace = self._state[Faces.TOP.value]
+                topFace = self.getState()[Faces.TOP.value]
             self.performAction(Action.F)
             self.performAction(Action.U)
             self.performAction(Action.R)
@@ -382,6 +624,7 @@ class RubiksCube:
         # Cube is still upside down
             
         # 6 Yellow corners on top
+        self.setSolveStage("yellow corners")
         self.orientCube(upsideDown = True)
         self.orientState(desiredState, upsideDown = True)
         
@@ -393,23 +636,23 @@ class RubiksCube:
         # Loop until complete
         while not self.isDesiredState(desiredState):
             # Find how many corners are yellow
-            numberYellowCorners = sum([1 for coords in [(0, 0), (0, 2), (2, 0), (2, 2)] if self._state[Faces.TOP.value][coords[0]][coords[1]] == RubiksColor.YELLOW])
+            numberYellowCorners = sum([1 for coords in [(0, 0), (0, 2), (2, 0), (2, 2)] if self.getSquare(Faces.TOP, coords[0], coords[1]) == RubiksColor.YELLOW])
             if numberYellowCorners == 1:
-                while self._state[Faces.TOP.value][2][0] != RubiksColor.YELLOW:
+                while self.getSquare(Faces.TOP, 2, 0) != RubiksColor.YELLOW:
                     self.performAction(Action.U)
             else:
-                while self._state[Faces.FRONT.value][0][0] != RubiksColor.YELLOW:
+                while self.getSquare(Faces.FRONT, 0, 0) != RubiksColor.YELLOW:
                     self.performAction(Action.U)
             self.performAction(Action.R)
             self.performAction(Action.U)
             self.performAction(Action.RP)
             self.performAction(Action.U)
             self.performAction(Action.R)
-            self.performAction(Action.U)
-            self.performAction(Action.U)
+            self.performAction(Action.U2)
             self.performAction(Action.RP)
             
         # 7: Yellow corners in place
+        self.setSolveStage("yellow corners in place")
         self.orientCube(upsideDown = True)
         self.orientState(desiredState, upsideDown = True)
         
@@ -421,29 +664,26 @@ class RubiksCube:
         if not self.incrementLookahead(1, 2, desiredState):
             twoYellowCornersCorrect = False
             for face in [Faces.FRONT, Faces.RIGHT, Faces.BACK, Faces.LEFT]:
-                if self._state[face.value][0][0] == self._state[face.value][0][2]:
+                if self.getSquare(face, 0, 0) == self.getSquare(face, 0, 2):
                     twoYellowCornersCorrect = True
                     break
             
             while True:
                 if twoYellowCornersCorrect:
                     # Position solved on back
-                    while not (self._state[Faces.BACK.value][0][0] == self._state[Faces.BACK.value][0][2]):
+                    while not (self.getSquare(Faces.BACK, 0, 0) == self.getSquare(Faces.BACK, 0, 2)):
                         self.performAction(Action.U)
                 
                 # Do sequence
                 self.performAction(Action.RP)
                 self.performAction(Action.F)
                 self.performAction(Action.RP)
-                self.performAction(Action.B)
-                self.performAction(Action.B)
+                self.performAction(Action.B2)
                 self.performAction(Action.R)
                 self.performAction(Action.FP)
                 self.performAction(Action.RP)
-                self.performAction(Action.B)
-                self.performAction(Action.B)
-                self.performAction(Action.R)
-                self.performAction(Action.R)
+                self.performAction(Action.B2)
+                self.performAction(Action.R2)
                 
                 if twoYellowCornersCorrect:
                     break
@@ -453,6 +693,7 @@ class RubiksCube:
             self.incrementLookahead(1, 2, desiredState)
             
         # 8: Edges in place
+        self.setSolveStage("yellow edges in place")
         self.orientCube(upsideDown = True)
         self.orientState(desiredState, upsideDown = True)
         desiredState[Faces.FRONT.value][0][1] = RubiksColor.BLUE
@@ -463,43 +704,37 @@ class RubiksCube:
         if not self.isDesiredState(desiredState):
             oneYellowEdgeSolved = False
             for face in [Faces.FRONT, Faces.RIGHT, Faces.BACK, Faces.LEFT]:
-                if self._state[face.value][0][1] == self._state[face.value][0][2]:
+                if self.getSquare(face, 0, 1) == self.getSquare(face, 0, 2):
                     oneYellowEdgeSolved = True
                     break
                 
             while True:
                 if oneYellowEdgeSolved:
                     # Rotate until solved on back
-                    while self._state[Faces.BACK.value][0][1] != self._state[Faces.BACK.value][0][2]:
+                    while self.getSquare(Faces.BACK, 0, 1) != self.getSquare(Faces.BACK, 0, 2):
                         self.performAction(Action.TCW)
                         
                 # Do sequence
-                if not oneYellowEdgeSolved or self._state[Faces.RIGHT.value][0][1] == self._state[Faces.FRONT.value][0][0]:
-                    self.performAction(Action.F)
-                    self.performAction(Action.F)
+                if not oneYellowEdgeSolved or self.getSquare(Faces.RIGHT, 0, 1) == self.getSquare(Faces.FRONT, 0, 0):
+                    self.performAction(Action.F2)
                     self.performAction(Action.U)
                     self.performAction(Action.RP)
                     self.performAction(Action.L)
-                    self.performAction(Action.F)
-                    self.performAction(Action.F)
+                    self.performAction(Action.F2)
                     self.performAction(Action.R)
                     self.performAction(Action.LP)
                     self.performAction(Action.U)
-                    self.performAction(Action.F)
-                    self.performAction(Action.F)
+                    self.performAction(Action.F2)
                 else:
-                    self.performAction(Action.F)
-                    self.performAction(Action.F)
+                    self.performAction(Action.F2)
                     self.performAction(Action.UP)
                     self.performAction(Action.RP)
                     self.performAction(Action.L)
-                    self.performAction(Action.F)
-                    self.performAction(Action.F)
+                    self.performAction(Action.F2)
                     self.performAction(Action.R)
                     self.performAction(Action.LP)
                     self.performAction(Action.UP)
-                    self.performAction(Action.F)
-                    self.performAction(Action.F)
+                    self.performAction(Action.F2)
                 
                 if oneYellowEdgeSolved:
                     break
@@ -508,24 +743,97 @@ class RubiksCube:
             
         # Check to make sure that it's actually solved
         for face in Faces:
-            if min([self._state[face.value][r][c].value for r in range(3) for c in range(3)]) != self._state[face.value][0][0].value:
+            if min([self.getSquare(face, r, c).value for r in range(3) for c in range(3)]) != self.getSquare(face, 0, 0).value:
                 return False
-            
-        print("Solved!")
         return True
+    
+    # Functions for the solve budget (see setSolveBudget)
+    
+    def startSolveBudget(self):
+        # Starts counting what a solve uses, if it has any limits
+        self._budgeted = self._maxSearchNodes != None or self._maxSolveSeconds != None or self._maxSolveMoves != None
+        self._solveStage = None
+        self._searchNodesUsed = 0
+        self._solveMovesUsed = 0
+        self._solveStart = perf_counter()
+    
+    def setSolveStage(self, stage):
+        # Names the step the solve is on, for SolveBudgetExceeded
+        self._solveStage = stage
+    
+    def chargeSearchNodes(self, count):
+        # Counts count states about to be looked at by a search, raising SolveBudgetExceeded if that's too many or time is up
+        self._searchNodesUsed += count
+        if self._maxSearchNodes != None and self._searchNodesUsed > self._maxSearchNodes:
+            raise SolveBudgetExceeded(self._solveStage, 'nodes', self._searchNodesUsed)
+        self.checkSolveTime()
+    
+    def chargeMove(self):
+        # Counts a move about to be performed, raising SolveBudgetExceeded if that's too many or time is up
+        self._solveMovesUsed += 1
+        if self._maxSolveMoves != None and self._solveMovesUsed > self._maxSolveMoves:
+            raise SolveBudgetExceeded(self._solveStage, 'moves', self._solveMovesUsed)
+        self.checkSolveTime()
+    
+    def checkSolveTime(self):
+        if self._maxSolveSeconds != None:
+            seconds = perf_counter() - self._solveStart
+            if seconds > self._maxSolveSeconds:
+                raise SolveBudgetExceeded(self._solveStage, 'seconds', round(seconds, 3))
+    
+    def validate(self):
+        # Checks that the cube can be solved by solve, without trying to solve it (see validateCompactState)
+        # Also checks that the centers are in the color scheme solve works with
+        # Returns None if it can, otherwise a string saying what is wrong
+        state = self.getCompactState()
+        problem = validateCompactState(state)
+        if problem == None and RubiksCube.findOrientation(state, RubiksCube.getOrientationCenters()) == None:
+            problem = "The centers aren't in the usual color scheme--white opposite yellow, blue opposite green, red opposite orange, and orange on the right with white on top and blue in front"
+        return problem
+    
+    def solveTwoPhase(self, maxLength = 22, timeout = 5):
+        # Alternative to solve--finds a short solution with the two-phase algorithm (see RubiksCubeTwoPhase.py) and performs it
+        # Stops at the first solution of at most maxLength moves (half turns count as one), or the shortest found after timeout seconds
+        # Returns the list of moves performed, or None if impossible
+        # If the solver's tables haven't been cached on disk yet, the first call builds them, which takes a while
+        
+        moves = RubiksCubeTwoPhase.solveTwoPhase(self.getCompactState(), maxLength, timeout)
+        if moves == None:
+            return None
+        
+        self.clearMoveHistory()
+        for action in moves:
+            self.performAction(action)
+        return moves
             
     # Helper functions for solver
     
+    def findPiece(self, colors):
+        # Uses the piece index to find the piece with the given colors (in any order)
+        # Returns the flat index, as seen, of the square with the first of the colors, or None if there's no such piece
+        index = findPieceSquare(self._pieces, self._piecePositions, tuple([color.value for color in colors]))
+        if index == None or self._view == None:
+            return index
+        return self._view[2][index]
+    
     def findFace(self, color):
         # Finds face (from Faces Enum) based on its center color
+        if self._pieces != None:
+            index = self.findPiece((color,))
+            return Faces(index // 9) if index != None else None
         for face in Faces:
-            if (self._state[face.value][1][1] == color):
+            if (self.getSquare(face, 1, 1) == color):
                 return face
         return None
     
     def findEdge(self, color1, color2):
         # Finds an edge given the two colors
         # The point returned corresponds to the first color given
+        # Uses the piece index if there is one, otherwise searches the squares
+        if self._pieces != None:
+            index = self.findPiece((color1, color2))
+            return (Faces(index // 9), index // 3 % 3, index % 3) if index != None else None
+        
         pairs = [
             [(Faces.TOP, 0, 1), (Faces.BACK, 0, 1)],
             [(Faces.TOP, 1, 0), (Faces.LEFT, 0, 1)],
@@ -544,9 +852,9 @@ class RubiksCube:
         ]
         
         for (face1, r1, c1), (face2, r2, c2) in pairs:
-            if self._state[face1.value][r1][c1] == color1 and self._state[face2.value][r2][c2] == color2:
+            if self.getSquare(face1, r1, c1) == color1 and self.getSquare(face2, r2, c2) == color2:
                 return (face1, r1, c1)
-            if self._state[face1.value][r1][c1] == color2 and self._state[face2.value][r2][c2] == color1:
+            if self.getSquare(face1, r1, c1) == color2 and self.getSquare(face2, r2, c2) == color1:
                 return (face2, r2, c2)
         
         return None
@@ -554,6 +862,11 @@ class RubiksCube:
     def findCorner(self, color1, color2, color3):
         # Finds a corner given the three colors
         # The point returned corresponds to the first color given
+        # Uses the piece index if there is one, otherwise searches the squares
+        if self._pieces != None:
+            index = self.findPiece((color1, color2, color3))
+            return (Faces(index // 9), index // 3 % 3, index % 3) if index != None else None
+        
         groups = [
             [(Faces.TOP, 0, 0), (Faces.BACK, 0, 2), (Faces.LEFT, 0, 0)],
             [(Faces.TOP, 0, 2), (Faces.BACK, 0, 0), (Faces.RIGHT, 0, 2)],
@@ -567,69 +880,168 @@ class RubiksCube:
         ]
         
         for (face1, r1, c1), (face2, r2, c2), (face3, r3, c3) in groups:
-            if self._state[face1.value][r1][c1] == color1:
-                if (self._state[face2.value][r2][c2] == color2 and self._state[face3.value][r3][c3] == color3) or (self._state[face2.value][r2][c2] == color3 and self._state[face3.value][r3][c3] == color2):
+            if self.getSquare(face1, r1, c1) == color1:
+                if (self.getSquare(face2, r2, c2) == color2 and self.getSquare(face3, r3, c3) == color3) or (self.getSquare(face2, r2, c2) == color3 and self.getSquare(face3, r3, c3) == color2):
                     return (face1, r1, c1)
-            if self._state[face2.value][r2][c2] == color1:
-                if (self._state[face1.value][r1][c1] == color2 and self._state[face3.value][r3][c3] == color3) or (self._state[face1.value][r1][c1] == color3 and self._state[face3.value][r3][c3] == color2):
+            if self.getSquare(face2, r2, c2) == color1:
+                if (self.getSquare(face1, r1, c1) == color2 and self.getSquare(face3, r3, c3) == color3) or (self.getSquare(face1, r1, c1) == color3 and self.getSquare(face3, r3, c3) == color2):
                     return (face2, r2, c2)
-            if self._state[face3.value][r3][c3] == color1:
-                if (self._state[face1.value][r1][c1] == color2 and self._state[face2.value][r2][c2] == color3) or (self._state[face1.value][r1][c1] == color3 and self._state[face2.value][r2][c2] == color2):
+            if self.getSquare(face3, r3, c3) == color1:
+                if (self.getSquare(face1, r1, c1) == color2 and self.getSquare(face2, r2, c2) == color3) or (self.getSquare(face1, r1, c1) == color3 and self.getSquare(face2, r2, c2) == color2):
                     return (face3, r3, c3)
         
         return None
     
     def isDesiredState(self, desiredState):
-        # Compares _state to desiredState
-        # desiredState is formatted just like _state, but DEFAULT means don't-care
+        # Compares the state to desiredState
+        # desiredState is formatted like getState(), but DEFAULT means don't-care
+        state = self.getCompactState()
         for face in Faces:
             for row in range(3):
                 for col in range(3):
-                    if desiredState[face.value][row][col] != RubiksColor.DEFAULT and desiredState[face.value][row][col] != self._state[face.value][row][col]:
+                    desired = desiredState[face.value][row][col]
+                    if desired != RubiksColor.DEFAULT and desired.value != state[getIndex(face, row, col)]:
                         return False
         return True
     
     def lookahead(self, steps, desiredState, movesMade = [], includeTurns = False):
         # Looks given # of steps into the future, trying to achieve desiredState
-        # desiredState is formatted just like _state, but DEFAULT means don't-care
+        # desiredState is formatted like getState(), but DEFAULT means don't-care
         # Returns list of moves to take, or None
-                        
-        if self.isDesiredState(desiredState):
-            return movesMade
+        
+        moves = list(movesMade)
+        if self.searchDepth(bytearray(self.getCompactState()), RubiksCube.compileGoal(desiredState), steps, moves, includeTurns, True):
+            return moves
+        return None
+    
+    def searchDepth(self, state, goal, steps, moves, includeTurns, checkShallower, candidates = None):
+        # Depth-limited search used by lookahead and incrementLookahead
+        # state is a bytearray that each action is applied to in place, and undone with the inverse action
+        # moves is the stack of moves made so far--holds the solution when this returns True
+        # goal comes from compileGoal
+        # Skips move sequences that are redundant (see isRedundantAction)
+        # If checkShallower is False, only states exactly steps moves away are checked--
+        # the shallower ones were already checked by an earlier iteration
+        # candidates is the entry of searchSteps for the last two moves (looked up from moves if not given)
+        
+        (getter, target, leafGetters) = goal
+        if (checkShallower or steps == 0) and getter(state) == target:
+            return True
         
         if steps == 0:
-            return None
+            return False
         
         # Recursively try actions
-        for action in Action:
-            if (not includeTurns) and action in [Action.TCW, Action.TCCW, Action.TF, Action.TB]:
+        if candidates == None:
+            previousAction = moves[-1] if len(moves) > 0 else None
+            secondPreviousAction = moves[-2] if len(moves) > 1 else None
+            candidates = searchSteps[includeTurns][(previousAction, secondPreviousAction)]
+        if self._budgeted:
+            self.chargeSearchNodes(len(candidates))
+        for action, actionValue, gather, undoGather, nextCandidates in candidates:
+            if steps == 1:
+                # Last step--check the result without applying the action
+                if leafGetters[actionValue](state) == target:
+                    moves.append(action)
+                    return True
                 continue
-            cubeCopy = RubiksCube(self._state)
-            moves = []
-            moves.extend(movesMade)
+            
+            state[:] = gather(state)
             moves.append(action)
-            cubeCopy.performAction(action)
-            lookahead = cubeCopy.lookahead(steps - 1, desiredState, moves, includeTurns = includeTurns)
-            if lookahead != None:
-                return lookahead
+            if self.searchDepth(state, goal, steps - 1, moves, includeTurns, checkShallower, nextCandidates):
+                return True
+            moves.pop()
+            state[:] = undoGather(state)
             
-        return None
+        return False
+    
+    # Static helper function for searchDepth
+    def compileGoal(desiredState):
+        # Given desiredState, returns (getter, target, leafGetters)
+        # A compact state is desired when getter(state) == target
+        # The state after an action is desired when leafGetters[action.value](state) == target
+        (indices, target) = compileDesiredState(desiredState)
+        leafGetters = [getSquaresGetter([actionPermutations[action][index] for index in indices]) for action in Action]
+        return (getSquaresGetter(indices), target, leafGetters)
     
     def incrementLookahead(self, minSteps, maxSteps, desiredState, includeTurns = False):
-        # Does lookahead at minSteps, then increases stepsize to maxSteps
+        # Iterative deepening--does lookahead at minSteps, then increases stepsize to maxSteps
         # Returns False if not possible in # of steps, True otherwise
+        # Searches that were already done (from a state that is the same as far as the goal can tell) come from the lookahead cache
+        # Under a solve budget, a cached search is charged the nodes it took, so the budget doesn't depend on what's cached
         if self.isDesiredState(desiredState):
             return True
-        for i in range(minSteps, maxSteps + 1):
-            actions = self.lookahead(i, desiredState, includeTurns = includeTurns)
-            if actions != None:
-                break
+        
+        # The state as seen, gathered once for the search
+        state = self.getCompactState()
+        cache = RubiksCube._lookaheadCache
+        cacheKey = None
+        if RubiksCube._lookaheadCacheSize > 0:
+            (indices, target) = compileDesiredState(desiredState)
+            cacheKey = (bytes(indices), bytes(target), minSteps, maxSteps, includeTurns, self._searchMode, compileGoalKey(indices, target)(state))
+        
+        entry = cache.get(cacheKey) if cacheKey != None else None
+        if entry != None and self._budgeted:
+            # If the nodes weren't counted, or would go over the limit, search again--the budget then runs out where it would uncached
+            (actions, nodes) = entry
+            if nodes == None or (self._maxSearchNodes != None and self._searchNodesUsed + nodes > self._maxSearchNodes):
+                entry = None
+        
+        if entry != None:
+            RubiksCube._lookaheadCacheHits += 1
+            cache.move_to_end(cacheKey)
+            (actions, nodes) = entry
+            if self._budgeted:
+                self.chargeSearchNodes(nodes)
+        else:
+            RubiksCube._lookaheadCacheMisses += 1
+            nodesUsed = self._searchNodesUsed
+            actions = self.findLookahead(state, minSteps, maxSteps, desiredState, includeTurns)
+            if cacheKey != None:
+                cache[cacheKey] = (actions, self._searchNodesUsed - nodesUsed if self._budgeted else None)
+                cache.move_to_end(cacheKey)
+                if len(cache) > RubiksCube._lookaheadCacheSize:
+                    cache.popitem(last = False)
+        
         if actions == None:
             return False
         for action in actions:
             self.performAction(action)
         return True
     
+    def findLookahead(self, state, minSteps, maxSteps, desiredState, includeTurns = False):
+        # Search for incrementLookahead from state (a compact state, as seen), with the cube's search mode
+        # Returns a tuple of actions, or None if not possible in # of steps
+        if self._searchMode == 'frontier':
+            import RubiksCubeArray
+            chargeNodes = self.chargeSearchNodes if self._budgeted else None
+            actions = RubiksCubeArray.frontierSearch(state, desiredState, maxSteps, includeTurns, chargeNodes)
+            return tuple(actions) if actions != None else None
+        goal = RubiksCube.compileGoal(desiredState)
+        state = bytearray(state)
+        actions = []
+        for i in range(minSteps, maxSteps + 1):
+            if self.searchDepth(state, goal, i, actions, includeTurns, i == minSteps):
+                return tuple(actions)
+        return None
+    
+    # Static functions for the lookahead cache
+    
+    def setLookaheadCacheSize(size):
+        # Sets the most searches the lookahead cache keeps--0 turns it off
+        RubiksCube._lookaheadCacheSize = size
+        while len(RubiksCube._lookaheadCache) > size:
+            RubiksCube._lookaheadCache.popitem(last = False)
+    
+    def getLookaheadCacheStats():
+        # Returns (hits, misses, number of searches kept)
+        return (RubiksCube._lookaheadCacheHits, RubiksCube._lookaheadCacheMisses, len(RubiksCube._lookaheadCache))
+    
+    def clearLookaheadCache():
+        RubiksCube._lookaheadCache.clear()
+        RubiksCube._lookaheadCacheHits = 0
+        RubiksCube._lookaheadCacheMisses = 0
+    
     
     # Subfunctions for solver
     
@@ -638,39 +1050,58 @@ class RubiksCube:
         # Orients cube with yellow on top and blue at front if upsideDown
         # Optional desiredState pointer argument--if passed, this initializes and edits that array by reference.
         # Otherwise, this just makes its own array
+        # Uses the fewest whole-cube turns (see orientations), and does nothing if no orientation has the right centers
         
         desiredState = stateDefault() if (desiredStatePointer == None) else desiredStatePointer
         
-        desiredState[Faces.TOP.value][1][1] = RubiksColor.WHITE if not upsideDown else RubiksColor.YELLOW
-        desiredState[Faces.FRONT.value][1][1] = RubiksColor.BLUE
-        desiredState[Faces.RIGHT.value][1][1] = RubiksColor.ORANGE if not upsideDown else RubiksColor.RED
-        desiredState[Faces.BACK.value][1][1] = RubiksColor.GREEN
-        desiredState[Faces.LEFT.value][1][1] = RubiksColor.RED if not upsideDown else RubiksColor.ORANGE
-        desiredState[Faces.BOTTOM.value][1][1] = RubiksColor.YELLOW if not upsideDown else RubiksColor.WHITE
-        self.incrementLookahead(1, 4, desiredState, True)
+        centers = RubiksCube.getOrientationCenters(upsideDown)
+        for face in Faces:
+            desiredState[face.value][1][1] = centers[face.value]
+        
+        orientation = RubiksCube.findOrientation(self.getCompactState(), centers)
+        if orientation != None:
+            for action in orientation[0]:
+                self.performAction(action)
     
     def orientState(self, state, upsideDown = False):
         # Adjust the pointed-to state array--for when the cube is rotated (performed on desiredState)
         # Changes the state array itself
         
-        desiredState = stateDefault()
-        
-        desiredState[Faces.TOP.value][1][1] = RubiksColor.WHITE if not upsideDown else RubiksColor.YELLOW
-        desiredState[Faces.FRONT.value][1][1] = RubiksColor.BLUE
-        desiredState[Faces.RIGHT.value][1][1] = RubiksColor.ORANGE if not upsideDown else RubiksColor.RED
-        desiredState[Faces.BACK.value][1][1] = RubiksColor.GREEN
-        desiredState[Faces.LEFT.value][1][1] = RubiksColor.RED if not upsideDown else RubiksColor.ORANGE
-        desiredState[Faces.BOTTOM.value][1][1] = RubiksColor.YELLOW if not upsideDown else RubiksColor.WHITE
-        
-        cubeCopy = RubiksCube(state)
-        cubeCopy.incrementLookahead(1, 4, desiredState, True)
-        revisedState = cubeCopy.getState()
+        compactState = stateToCompact(state)
+        orientation = RubiksCube.findOrientation(compactState, RubiksCube.getOrientationCenters(upsideDown))
+        if orientation == None:
+            return
+        revisedState = compactToState(bytes(itemgetter(*orientation[1])(compactState)))
         
         for face in Faces:
             for row in range(3):
                 for col in range(3):
                     state[face.value][row][col] = revisedState[face.value][row][col]
     
+    # Static helper functions for orientCube and orientState
+    
+    def getOrientationCenters(upsideDown = False):
+        # Returns the center color wanted on each face (in Faces order) by orientCube
+        if not upsideDown:
+            return [RubiksColor.WHITE, RubiksColor.BLUE, RubiksColor.ORANGE, RubiksColor.GREEN, RubiksColor.RED, RubiksColor.YELLOW]
+        return [RubiksColor.YELLOW, RubiksColor.BLUE, RubiksColor.RED, RubiksColor.GREEN, RubiksColor.ORANGE, RubiksColor.WHITE]
+    
+    def findOrientation(compactState, centers):
+        # Returns (turns, permutation) from orientations that puts the center colors given for each face in place,
+        # or None if no orientation does
+        centerCodes = [compactState[getIndex(face, 1, 1)] for face in Faces]
+        if centers[Faces.TOP.value].value not in centerCodes or centers[Faces.FRONT.value].value not in centerCodes:
+            return None
+        key = (Faces(centerCodes.index(centers[Faces.TOP.value].value)), Faces(centerCodes.index(centers[Faces.FRONT.value].value)))
+        orientation = orientations.get(key)
+        if orientation == None:
+            return None
+        (turns, permutation) = orientation
+        for face in Faces:
+            if compactState[permutation[getIndex(face, 1, 1)]] != centers[face.value].value:
+                return None
+        return orientation
+    
     def doWhiteCorner(self, desiredState, color2, color3):
         # Get a white corner into place given 3 colors
         # Must be done in this order: wbr, wob, wrg, wgo--colors 2 and 3 cannot be interchanged
@@ -865,4 +1296,96 @@ class RubiksCube:
             self.performAction(Action.F)
             self.performAction(Action.U)
             self.performAction(Action.FP)
+
+
+# Ways incrementLookahead can search (see RubiksCube.setSearchMode)
+searchModes = ['depth', 'frontier']
+
+# Precompiled moves--each action as a single permutation of the 54 flat indices, built once at import
+# getTransformations and transform remain the reference definitions of each move
+actionPermutations = {action : compilePermutation(RubiksCube.getTransformations(action)) for action in Action}
+actionGathers = {action : itemgetter(*permutation) for action, permutation in actionPermutations.items()}
+
+def getActionDestinations(permutation):
+    # Returns where each square goes with the action--the inverse of its permutation
+    destinations = [0] * 54
+    for index, origin in enumerate(permutation):
+        destinations[origin] = index
+    return destinations
+
+# actionDestinations[action][index] is the flat index the square at index is moved to by action
+actionDestinations = {action : getActionDestinations(permutation) for action, permutation in actionPermutations.items()}
+
+def getOrientations():
+    # Breadth-first search over whole-cube turns for the 24 orientations
+    # Returns a dictionary: (face whose center ends up on top, face whose center ends up in front) -> (turns, permutation)
+        # turns is the shortest list of turns to get there, the first in Action order--the same ones lookahead would find
+        # permutation is the turns as one permutation of the 54 flat indices (see compilePermutation)
+    identity = tuple(range(54))
+    orientations = {(Faces.TOP, Faces.FRONT) : ([], identity)}
+    queue = deque([([], identity)])
+    while len(queue) > 0:
+        (turns, permutation) = queue.popleft()
+        for action in turnActions:
+            turnedPermutation = tuple([permutation[index] for index in actionPermutations[action]])
+            key = (Faces(turnedPermutation[getIndex(Faces.TOP, 1, 1)] // 9), Faces(turnedPermutation[getIndex(Faces.FRONT, 1, 1)] // 9))
+            if key not in orientations:
+                orientations[key] = (turns + [action], turnedPermutation)
+                queue.append(orientations[key])
+    return orientations
+
+orientations = getOrientations()
+
+def getOrientationTables():
+    # Tables for virtual rotations (see RubiksCube.setVirtualRotations), for each orientation key
+    # Returns (orientationTurns, orientationActions, orientationViews)
+        # orientationTurns[(orientation, turn)] is the orientation after the turn
+        # orientationActions[(orientation, action)] is the move that really turns the same face as action in that orientation
+        # orientationViews[orientation] is (permutation, gather, positions) for seeing the cube as really held from that orientation:
+            # the square seen at flat index i is at permutation[i] as held, and gather gets the whole state as seen
+            # positions is the inverse--the square at flat index i as held is seen at positions[i]
+    orientationTurns = {}
+    orientationActions = {}
+    orientationViews = {}
+    for orientation, (_, permutation) in orientations.items():
+        for turn in turnActions:
+            turnedPermutation = tuple([permutation[index] for index in actionPermutations[turn]])
+            orientationTurns[(orientation, turn)] = (Faces(turnedPermutation[getIndex(Faces.TOP, 1, 1)] // 9), Faces(turnedPermutation[getIndex(Faces.FRONT, 1, 1)] // 9))
         
+        positions = [0] * 54
+        for index in range(54):
+            positions[permutation[index]] = index
+        orientationViews[orientation] = (permutation, itemgetter(*permutation), positions)
+        
+        for action in moveActions:
+            # The move seen as action, done to the cube as really held, is permutation, then action, then permutation undone
+            physicalPermutation = [0] * 54
+            for index in range(54):
+                physicalPermutation[permutation[index]] = permutation[actionPermutations[action][index]]
+            orientationActions[(orientation, action)] = [move for move in moveActions if actionPermutations[move] == physicalPermutation][0]
+    return (orientationTurns, orientationActions, orientationViews)
+
+(orientationTurns, orientationActions, orientationViews) = getOrientationTables()
+
+# Actions for the lookahead search to try after the previous two actions, without redundant ones
+# searchActions[includeTurns][(previousAction, secondPreviousAction)]
+searchActions = {
+    includeTurns : {
+        (previousAction, secondPreviousAction) : [action for action in Action if (includeTurns or action in moveActions) and not isRedundantAction(action, previousAction, secondPreviousAction)]
+        for previousAction in [None] + list(Action) for secondPreviousAction in [None] + list(Action)
+    }
+    for includeTurns in [False, True]
+}
+
+def getSearchSteps():
+    # searchActions ready for searchDepth, so it doesn't look up Actions in dictionaries
+    # searchSteps[includeTurns][(previousAction, secondPreviousAction)] is a list of
+    # (action, action value, action's gather, inverse action's gather, searchSteps entry after the action)
+    searchSteps = {includeTurns : {key : [] for key in searchActions[includeTurns]} for includeTurns in [False, True]}
+    for includeTurns, candidateLists in searchSteps.items():
+        for (previousAction, secondPreviousAction), candidates in candidateLists.items():
+            for action in searchActions[includeTurns][(previousAction, secondPreviousAction)]:
+                candidates.append((action, action.value, actionGathers[action], actionGathers[inverseActions[action]], candidateLists[(action, previousAction)]))
+    return searchSteps
+
+searchSteps = getSearchSteps()
@@ -0,0 +1,157 @@
+# Many cubes at once, held as an (N, 54) uint8 NumPy array of compact states (see stateToCompact)
+    # Moves are the same permutations RubiksCube.performAction uses (compiled from RubiksCube.getTransformations),
+    # applied to every cube with one NumPy gather
+    # Requires NumPy
+
+from RubiksCubeUtil import *
+from RubiksCube import RubiksCube, actionPermutations
+import numpy as np
+
+# permutationTable[action.value] is the permutation of that action
+permutationTable = np.array([actionPermutations[action] for action in Action], dtype = np.intp)
+
+def toActionValues(actions):
+    # Converts a sequence of actions (Action Enums or their values) to an array of action values
+    if isinstance(actions, np.ndarray):
+        return actions.astype(np.intp, copy = False)
+    return np.array([action.value if isinstance(action, Action) else action for action in actions], dtype = np.intp)
+
+# Bit offset of each of the 18 squares packed into one 64-bit word of a state key (3 bits per color code)
+keyShifts = np.arange(0, 54, 3, dtype = np.uint64)
+
+def getStateKeys(states):
+    # Returns one 24-byte key per state of an (N, 54) array, equal exactly when the states are equal
+    packed = np.left_shift(states.reshape(-1, 3, 18).astype(np.uint64), keyShifts).sum(axis = 2, dtype = np.uint64)
+    return packed.view('V24').ravel()
+
+def composePermutations(actions):
+    # Returns the single permutation that does the given actions in order
+    permutation = np.arange(54, dtype = np.intp)
+    for action in toActionValues(actions):
+        permutation = permutation[permutationTable[action]]
+    return permutation
+
+class RubiksCubeArray:
+
+    '''
+    N cubes, stored as an (N, 54) uint8 array
+        Row i is the compact state of cube i: the RubiksColor value of each square, in getIndex order
+    '''
+    _states = None
+
+    def __init__(self, states):
+        # states can be an (N, 54) array, or a list of compact states or Color[3][3][6] states
+        self.setStates(states)
+
+    def setStates(self, states):
+        if isinstance(states, np.ndarray):
+            states = np.ascontiguousarray(states, dtype = np.uint8)
+        elif len(states) > 0 and not isinstance(states[0], (bytes, bytearray)):
+            states = np.frombuffer(b''.join([stateToCompact(state) for state in states]), dtype = np.uint8)
+        else:
+            states = np.frombuffer(b''.join(states), dtype = np.uint8)
+        self._states = states.reshape(-1, 54)
+
+    def getStates(self):
+        # Returns the (N, 54) array (not a copy)
+        return self._states
+
+    def getCompactStates(self):
+        return [row.tobytes() for row in self._states]
+
+    def getCube(self, index):
+        # Returns cube index as a RubiksCube
+        return RubiksCube(self._states[index].tobytes())
+
+    def __len__(self):
+        return len(self._states)
+
+    def performAction(self, action):
+        # Performs the same action on every cube
+        self._states = self._states[:, permutationTable[action.value]]
+
+    def performActions(self, actions):
+        # Performs one action per cube--actions has N entries (Action Enums or their values)
+        permutations = permutationTable[toActionValues(actions)]
+        self._states = np.take_along_axis(self._states, permutations, axis = 1)
+
+    def performSequence(self, actions):
+        # Performs the same list of actions on every cube, as one gather
+        self._states = self._states[:, composePermutations(actions)]
+
+
+def frontierSearch(compactState, desiredState, maxSteps, includeTurns = False, chargeNodes = None):
+    # Breadth-first search from compactState for desiredState (formatted like getState(), DEFAULT means don't-care)
+    # Each depth is done at once: every child of every frontier state is checked against the goal with one comparison,
+    # then the children already seen (at this depth or the one before) are dropped, so each state is expanded once
+    # Returns the list of at most maxSteps actions to take, or None
+    # Like RubiksCube.searchDepth, finds a shortest solution, taking the first one in Action order
+    # If chargeNodes is given, it's called with the number of children before each depth is expanded (see RubiksCube.chargeSearchNodes)
+
+    actions = [action for action in Action if includeTurns or action in moveActions]
+    permutations = permutationTable[toActionValues(actions)]
+    (indices, target) = compileDesiredState(desiredState)
+    target = np.array(target, dtype = np.uint8)
+    # goalGathers[a] gets the goal squares of the state after actions[a], straight from the state before it
+    goalGathers = permutations[:, indices]
+
+    frontier = np.frombuffer(compactState, dtype = np.uint8).reshape(1, 54)
+    if np.array_equal(frontier[0, indices], target):
+        return []
+    frontierKeys = getStateKeys(frontier)
+    previousKeys = frontierKeys[:0]
+    # levels[depth] = (index of each frontier state's parent in the previous frontier, index of its action)
+    levels = []
+    for depth in range(maxSteps):
+        found = np.flatnonzero((frontier[:, goalGathers] == target).all(axis = 2))
+        if len(found) > 0:
+            (parent, action) = divmod(int(found[0]), len(actions))
+            moves = [actions[action]]
+            for parents, parentActions in reversed(levels):
+                moves.append(actions[parentActions[parent]])
+                parent = parents[parent]
+            return moves[::-1]
+        if depth == maxSteps - 1:
+            break
+
+        if chargeNodes != None:
+            chargeNodes(len(frontier) * len(actions))
+        children = frontier[:, permutations].reshape(-1, 54)
+        keys = getStateKeys(children)
+        # np.unique gives the first occurrence of each key, so seen states win and children keep their order
+        (_, first) = np.unique(np.concatenate([previousKeys, frontierKeys, keys]), return_index = True)
+        seen = len(previousKeys) + len(frontierKeys)
+        new = np.sort(first[first >= seen]) - seen
+        levels.append((new // len(actions), new % len(actions)))
+        previousKeys = frontierKeys
+        frontierKeys = keys[new]
+        frontier = children[new]
+    return None
+
+def getScrambledCubes(count, length = 30, seed = None, actions = moveActions):
+    # Returns a RubiksCubeArray of count cubes, each solved (see stateSolved) and then given length random actions
+    random = np.random.default_rng(seed)
+    actionValues = toActionValues(actions)
+    cubes = RubiksCubeArray(np.tile(np.frombuffer(stateToCompact(stateSolved()), dtype = np.uint8), (count, 1)))
+    for _ in range(length):
+        cubes.performActions(actionValues[random.integers(len(actionValues), size = count)])
+    return cubes
+
+def verifyMoves(count = 100, seed = 0):
+    # Checks the batched moves against the reference transformations (RubiksCube.transform of getTransformations)
+    # on random states, for every action--returns True if they all match
+    random = np.random.default_rng(seed)
+    cubes = RubiksCubeArray(random.integers(len(RubiksColor), size = (count, 54), dtype = np.uint8))
+    for action in Action:
+        moved = RubiksCubeArray(cubes.getStates())
+        moved.performAction(action)
+        for index in range(count):
+            cube = cubes.getCube(index)
+            cube.transform(RubiksCube.getTransformations(action))
+            if cube.getCompactState() != moved.getStates()[index].tobytes():
+                return False
+    return True
+
+
+if __name__ == '__main__':
+    print("Moves match the reference transformations" if verifyMoves() else "Moves DO NOT match the reference transformations")
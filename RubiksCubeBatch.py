@@ -0,0 +1,167 @@
+# Solving many cubes at once, spread over a pool of worker processes
+    # Each cube is given as a state string (see parseRubiksCubeState)
+    # Command line usage--reads one state string per line from a file (or standard input) and prints each solution:
+        # python RubiksCubeBatch.py [file] [--workers N] [--method solve|twoPhase] [--no-rotations] [--optimize]
+            # [--max-nodes N] [--max-seconds S] [--max-moves N]
+
+from RubiksCubeUtil import *
+from RubiksCube import RubiksCube, SolveBudgetExceeded
+from RubiksCubeCubies import validateCompactState
+import RubiksCubeTwoPhase
+import multiprocessing
+import os
+import queue
+import time
+
+# Solvers to choose from: RubiksCube.solve or RubiksCube.solveTwoPhase
+solveMethods = ['solve', 'twoPhase']
+
+def solveStateString(stateStr, method = 'solve', virtualRotations = False, optimize = False, budget = None):
+    # Solves one cube given as a state string
+    # If virtualRotations is True, the moves have no whole-cube turns (see RubiksCube.setVirtualRotations)
+    # If optimize is True, solve's moves are shortened with RubiksCube.optimizeMoveHistory
+    # budget is (maxSearchNodes, maxSeconds, maxMoves) for solve (see RubiksCube.setSolveBudget), or None for no limits
+        # A cube that uses up its budget isn't solved, and problem says where it got to
+    # Returns (moves, seconds, problem)--moves is None if the cube wasn't solved, and problem then says why
+    # Illegal cubes are caught before any solving (see RubiksCube.validate), so they take almost no time
+    start = time.perf_counter()
+    try:
+        cube = RubiksCube(parseCompactState(stateStr.replace(' ', '')))
+    except ValueError as error:
+        return (None, time.perf_counter() - start, str(error))
+    cube.setVirtualRotations(virtualRotations)
+    if budget != None:
+        cube.setSolveBudget(*budget)
+
+    # The two-phase solver works with any color scheme, so only the pieces are checked for it
+    problem = validateCompactState(cube.getCompactState()) if method == 'twoPhase' else cube.validate()
+    if problem != None:
+        return (None, time.perf_counter() - start, problem)
+
+    try:
+        if method == 'twoPhase':
+            moves = cube.solveTwoPhase()
+        elif cube.solve(verbose = False):
+            if optimize:
+                cube.optimizeMoveHistory()
+            moves = cube.getMoveHistory()
+        else:
+            moves = None
+    except SolveBudgetExceeded as error:
+        return (None, time.perf_counter() - start, str(error))
+    return (moves, time.perf_counter() - start, "The solver didn't find a solution" if moves == None else None)
+
+def solveChunk(chunkNumber, chunk, method, virtualRotations, optimize, budget):
+    # Worker function--solves a list of (index, state string)
+    # Returns (chunkNumber, list of (index, moves, seconds, problem))
+    results = []
+    for index, stateStr in chunk:
+        (moves, seconds, problem) = solveStateString(stateStr, method, virtualRotations, optimize, budget)
+        results.append((index, moves, seconds, problem))
+    return (chunkNumber, results)
+
+def getChunks(iterable, chunkSize):
+    # Yields lists of up to chunkSize items from iterable, reading it lazily
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == chunkSize:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+def iterSolveMany(stateStrs, workers = None, method = 'solve', ordered = False, chunkSize = 8, virtualRotations = False, optimize = False, budget = None):
+    # Yields (index, moves, seconds, problem) for each state string, where index is its position in stateStrs
+    # and moves is None if it couldn't be solved, with problem saying why (see solveStateString)
+    # Results come in the order they finish, or in input order if ordered is True
+    # workers is the number of processes (defaults to one per CPU); with 1, everything runs in this process
+    # stateStrs is read lazily and only a few chunks per worker are in flight at once, so memory stays flat for long inputs
+
+    if method not in solveMethods:
+        raise ValueError("Unknown solve method: %s" % method)
+    if workers == None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        for index, stateStr in enumerate(stateStrs):
+            (moves, seconds, problem) = solveStateString(stateStr, method, virtualRotations, optimize, budget)
+            yield (index, moves, seconds, problem)
+        return
+
+    # Build or map the two-phase tables once here, so the workers don't all build them
+    if method == 'twoPhase':
+        RubiksCubeTwoPhase.getTables()
+
+    finished = queue.Queue()
+    maxInFlight = 4 * workers
+    with multiprocessing.Pool(workers) as pool:
+        chunks = getChunks(enumerate(stateStrs), chunkSize)
+        chunkCount = 0
+        inFlight = 0
+        nextChunkNumber = 0
+        finishedChunks = {}
+        while True:
+            # Keep up to maxInFlight chunks submitted but not yet yielded
+            while inFlight < maxInFlight:
+                chunk = next(chunks, None)
+                if chunk == None:
+                    break
+                pool.apply_async(solveChunk, (chunkCount, chunk, method, virtualRotations, optimize, budget), callback = finished.put, error_callback = finished.put)
+                chunkCount += 1
+                inFlight += 1
+            if inFlight == 0:
+                break
+
+            result = finished.get()
+            if isinstance(result, BaseException):
+                raise result
+            (chunkNumber, results) = result
+            if not ordered:
+                inFlight -= 1
+                yield from results
+                continue
+
+            finishedChunks[chunkNumber] = results
+            while nextChunkNumber in finishedChunks:
+                inFlight -= 1
+                yield from finishedChunks.pop(nextChunkNumber)
+                nextChunkNumber += 1
+
+def solveMany(stateStrs, workers = None, method = 'solve', virtualRotations = False, optimize = False, budget = None):
+    # Solves each state string, spread over workers processes (see iterSolveMany)
+    # Returns a list of move lists in input order, with None for cubes that couldn't be solved
+    return [moves for (_, moves, _, _) in iterSolveMany(stateStrs, workers, method, ordered = True, virtualRotations = virtualRotations, optimize = optimize, budget = budget)]
+
+
+# Command-line options for the solve budget, shared with SolveRubiksCubes.py
+
+def addBudgetArguments(parser):
+    parser.add_argument('--max-nodes', type = int, default = None, help = "give up on a cube after its searches look at this many states")
+    parser.add_argument('--max-seconds', type = float, default = None, help = "give up on a cube after this many seconds")
+    parser.add_argument('--max-moves', type = int, default = None, help = "give up on a cube after this many moves")
+
+def getBudget(args):
+    # Returns the budget for solveStateString from the parsed options, or None if none were given
+    budget = (args.max_nodes, args.max_seconds, args.max_moves)
+    return None if budget == (None, None, None) else budget
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description = "Solve one cube per line of state strings")
+    parser.add_argument('file', nargs = '?', help = "file of state strings (default: standard input)")
+    parser.add_argument('--workers', type = int, default = None, help = "number of worker processes (default: one per CPU)")
+    parser.add_argument('--method', choices = solveMethods, default = 'solve')
+    parser.add_argument('--no-rotations', action = 'store_true', help = "leave whole-cube turns out of the solutions")
+    parser.add_argument('--optimize', action = 'store_true', help = "shorten the solutions by merging moves")
+    addBudgetArguments(parser)
+    args = parser.parse_args()
+
+    inputFile = open(args.file) if args.file != None else sys.stdin
+    with inputFile:
+        stateStrs = (line.strip() for line in inputFile if line.strip() != '')
+        for index, moves, seconds, problem in iterSolveMany(stateStrs, args.workers, args.method, ordered = True, virtualRotations = args.no_rotations, optimize = args.optimize, budget = getBudget(args)):
+            print("FAILED: %s" % problem if moves == None else ' '.join([action.name for action in moves]), flush = True)
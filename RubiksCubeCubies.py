@@ -0,0 +1,306 @@
+# Cubie-level model of a Rubik's Cube
+    # Instead of 54 squares, the cube is described by its 8 corner pieces and 12 edge pieces:
+    # which piece is in each position, and how it is twisted (corners) or flipped (edges) there
+    # A piece is named by the faces whose center colors it has--e.g. the URF corner is the one colored like the top, right and front centers
+    # Positions are named the same way--the URF position is the corner between the top, right and front faces
+
+from RubiksCubeUtil import *
+
+class Corners(Enum):
+    URF = 0
+    UFL = 1
+    ULB = 2
+    UBR = 3
+    DFR = 4
+    DLF = 5
+    DBL = 6
+    DRB = 7
+class Edges(Enum):
+    UR = 0
+    UF = 1
+    UL = 2
+    UB = 3
+    DR = 4
+    DF = 5
+    DL = 6
+    DB = 7
+    FR = 8
+    FL = 9
+    BL = 10
+    BR = 11
+
+# Squares of each corner position, indexed by Corners value
+# The first square is on the top or bottom face; the others follow clockwise around the corner
+cornerPoints = [
+    [(Faces.TOP, 2, 2), (Faces.RIGHT, 0, 0), (Faces.FRONT, 0, 2)],
+    [(Faces.TOP, 2, 0), (Faces.FRONT, 0, 0), (Faces.LEFT, 0, 2)],
+    [(Faces.TOP, 0, 0), (Faces.LEFT, 0, 0), (Faces.BACK, 0, 2)],
+    [(Faces.TOP, 0, 2), (Faces.BACK, 0, 0), (Faces.RIGHT, 0, 2)],
+    [(Faces.BOTTOM, 0, 2), (Faces.FRONT, 2, 2), (Faces.RIGHT, 2, 0)],
+    [(Faces.BOTTOM, 0, 0), (Faces.LEFT, 2, 2), (Faces.FRONT, 2, 0)],
+    [(Faces.BOTTOM, 2, 0), (Faces.BACK, 2, 2), (Faces.LEFT, 2, 0)],
+    [(Faces.BOTTOM, 2, 2), (Faces.RIGHT, 2, 2), (Faces.BACK, 2, 0)]
+]
+
+# Squares of each edge position, indexed by Edges value
+# The first square is on the top or bottom face, or for the middle row, on the front or back face
+edgePoints = [
+    [(Faces.TOP, 1, 2), (Faces.RIGHT, 0, 1)],
+    [(Faces.TOP, 2, 1), (Faces.FRONT, 0, 1)],
+    [(Faces.TOP, 1, 0), (Faces.LEFT, 0, 1)],
+    [(Faces.TOP, 0, 1), (Faces.BACK, 0, 1)],
+    [(Faces.BOTTOM, 1, 2), (Faces.RIGHT, 2, 1)],
+    [(Faces.BOTTOM, 0, 1), (Faces.FRONT, 2, 1)],
+    [(Faces.BOTTOM, 1, 0), (Faces.LEFT, 2, 1)],
+    [(Faces.BOTTOM, 2, 1), (Faces.BACK, 2, 1)],
+    [(Faces.FRONT, 1, 2), (Faces.RIGHT, 1, 0)],
+    [(Faces.FRONT, 1, 0), (Faces.LEFT, 1, 2)],
+    [(Faces.BACK, 1, 2), (Faces.LEFT, 1, 0)],
+    [(Faces.BACK, 1, 0), (Faces.RIGHT, 1, 2)]
+]
+
+# Same as above, but as flat indices (see getIndex)
+cornerIndices = [[getIndex(face, row, col) for (face, row, col) in points] for points in cornerPoints]
+edgeIndices = [[getIndex(face, row, col) for (face, row, col) in points] for points in edgePoints]
+
+# The pieces, as the faces (by Faces value) whose colors they have, in the order of their squares when in place
+cornerFaces = [tuple([face.value for (face, _, _) in points]) for points in cornerPoints]
+edgeFaces = [tuple([face.value for (face, _, _) in points]) for points in edgePoints]
+cornerByFaces = {faces : corner for corner, faces in enumerate(cornerFaces)}
+edgeByFaces = {faces : edge for edge, faces in enumerate(edgeFaces)}
+
+# The corners of a real cube (see stateSolved), as the color codes of their squares in order around them, starting from each square
+# A corner whose colors go around the other way is the mirror image of a real one
+def getSchemeCorners():
+    solved = stateToCompact(stateSolved())
+    corners = set()
+    for indices in cornerIndices:
+        colors = tuple([solved[index] for index in indices])
+        for i in range(3):
+            corners.add(colors[i:] + colors[:i])
+    return corners
+
+schemeCorners = getSchemeCorners()
+
+# Squares of every piece: corners and edges in position order (as in cornerIndices and edgeIndices), then the centers
+# Moves never change the order of a piece's squares going around it
+pieceIndices = cornerIndices + edgeIndices + [[getIndex(face, 1, 1)] for face in Faces]
+
+def getPieceSquares():
+    # Returns a list giving, for each flat index, (the position in pieceIndices it belongs to, its place in that position's squares)
+    pieceSquares = [None] * 54
+    for position, indices in enumerate(pieceIndices):
+        for place, index in enumerate(indices):
+            pieceSquares[index] = (position, place)
+    return pieceSquares
+
+pieceSquares = getPieceSquares()
+
+class CubieCube:
+
+    '''
+    Cube defined by its pieces
+        cp[i] is the corner piece (Corners value) in corner position i
+        co[i] is its twist--the index (into cornerPoints[i]) of its square that has a top/bottom color
+        ep[i] is the edge piece (Edges value) in edge position i
+        eo[i] is its flip--0 if its first square (see edgePoints) is in the first square of position i, 1 otherwise
+    Solved when cp and ep are in order and co and eo are all 0
+    '''
+
+    def __init__(self, cp = None, co = None, ep = None, eo = None):
+        self.cp = list(range(8)) if cp == None else list(cp)
+        self.co = [0]*8 if co == None else list(co)
+        self.ep = list(range(12)) if ep == None else list(ep)
+        self.eo = [0]*12 if eo == None else list(eo)
+
+    def copy(self):
+        return CubieCube(self.cp, self.co, self.ep, self.eo)
+
+    def __eq__(self, other):
+        return isinstance(other, CubieCube) and (self.cp, self.co, self.ep, self.eo) == (other.cp, other.co, other.ep, other.eo)
+
+    def cornerMultiply(self, other):
+        # Changes the corners to those of self followed by other
+        cp = self.cp
+        co = self.co
+        self.cp = [cp[j] for j in other.cp]
+        self.co = [(co[j] + twist) % 3 for j, twist in zip(other.cp, other.co)]
+
+    def edgeMultiply(self, other):
+        # Changes the edges to those of self followed by other
+        ep = self.ep
+        eo = self.eo
+        self.ep = [ep[j] for j in other.ep]
+        self.eo = [eo[j] ^ flip for j, flip in zip(other.ep, other.eo)]
+
+    def multiply(self, other):
+        # Changes the cube to self followed by other--e.g. other can be a move from getCubieMove
+        self.cornerMultiply(other)
+        self.edgeMultiply(other)
+
+    def getCornerParity(self):
+        return getPermutationParity(self.cp)
+
+    def getEdgeParity(self):
+        return getPermutationParity(self.ep)
+
+    def isSolvable(self):
+        # Checks that each piece is used once, that the twists and flips add up, and that the permutation parities match
+        # These are exactly the cubes that can be solved with moves
+        return (sorted(self.cp) == list(range(8)) and sorted(self.ep) == list(range(12))
+                and sum(self.co) % 3 == 0 and sum(self.eo) % 2 == 0
+                and self.getCornerParity() == self.getEdgeParity())
+
+
+def getPermutationParity(permutation):
+    # Returns 0 for an even permutation, 1 for an odd one
+    parity = 0
+    for i in range(len(permutation)):
+        for j in range(i):
+            if permutation[j] > permutation[i]:
+                parity ^= 1
+    return parity
+
+def compactToCubies(compactState):
+    # Converts a compact state to a CubieCube, using the center colors to tell which face each color belongs to
+    # Returns None if the centers aren't six different colors or a position doesn't hold a real piece
+    # Doesn't check that each piece is used once--see CubieCube.isSolvable
+
+    faceOfColor = {compactState[getIndex(face, 1, 1)] : face.value for face in Faces}
+    if len(faceOfColor) != 6:
+        return None
+    faces = [faceOfColor.get(code) for code in compactState]
+
+    cubies = CubieCube()
+    for position, indices in enumerate(cornerIndices):
+        pieceFaces = [faces[index] for index in indices]
+        for twist in range(3):
+            if pieceFaces[twist] == Faces.TOP.value or pieceFaces[twist] == Faces.BOTTOM.value:
+                break
+        else:
+            return None
+        corner = cornerByFaces.get((pieceFaces[twist], pieceFaces[(twist + 1) % 3], pieceFaces[(twist + 2) % 3]))
+        if corner == None:
+            return None
+        cubies.cp[position] = corner
+        cubies.co[position] = twist
+
+    for position, indices in enumerate(edgeIndices):
+        pieceFaces = (faces[indices[0]], faces[indices[1]])
+        edge = edgeByFaces.get(pieceFaces)
+        if edge != None:
+            cubies.ep[position] = edge
+            cubies.eo[position] = 0
+            continue
+        edge = edgeByFaces.get((pieceFaces[1], pieceFaces[0]))
+        if edge == None:
+            return None
+        cubies.ep[position] = edge
+        cubies.eo[position] = 1
+
+    return cubies
+
+def cubiesToCompact(cubies, centers):
+    # Converts a CubieCube to a compact state
+    # centers is the color code of each face's center, in Faces order (e.g. taken from a compact state)
+
+    state = bytearray(54)
+    for face in Faces:
+        state[getIndex(face, 1, 1)] = centers[face.value]
+    for position, indices in enumerate(cornerIndices):
+        pieceFaces = cornerFaces[cubies.cp[position]]
+        twist = cubies.co[position]
+        for i in range(3):
+            state[indices[(twist + i) % 3]] = centers[pieceFaces[i]]
+    for position, indices in enumerate(edgeIndices):
+        pieceFaces = edgeFaces[cubies.ep[position]]
+        flip = cubies.eo[position]
+        for i in range(2):
+            state[indices[(flip + i) % 2]] = centers[pieceFaces[i]]
+    return bytes(state)
+
+def getPieceIndex(compactState):
+    # Indexes the pieces of a compact state by their colors, so they can be found without searching the squares
+    # Returns (pieces, positions), or (None, None) if two pieces have the same colors
+        # pieces[sorted tuple of a piece's color codes] = (piece number, its color codes going around it from its first square)
+        # positions[piece number] = flat index where the piece's first square is--kept up to date by moving it with each action
+    pieces = {}
+    for number, indices in enumerate(pieceIndices):
+        colors = tuple([compactState[index] for index in indices])
+        key = tuple(sorted(colors))
+        if key in pieces:
+            return (None, None)
+        pieces[key] = (number, colors)
+    return (pieces, tuple([indices[0] for indices in pieceIndices]))
+
+def findPieceSquare(pieces, positions, colorCodes):
+    # Given a piece index from getPieceIndex, finds the piece with the given colors (in any order)
+    # Returns the flat index of the square with the first of the colors, or None if there's no such piece
+    piece = pieces.get(tuple(sorted(colorCodes)))
+    if piece == None:
+        return None
+    (number, colors) = piece
+    (position, place) = pieceSquares[positions[number]]
+    indices = pieceIndices[position]
+    return indices[(place + colors.index(colorCodes[0])) % len(indices)]
+
+def validateCompactState(compactState):
+    # Checks, without solving, that a compact state is a cube that can be solved
+    # Returns None if it is, otherwise a string saying what is wrong
+    # Checks, in order: the number of squares of each color, the centers, that each position holds a real piece,
+    # that no corner is a mirror image of a real one, that no piece appears twice, the corner twists, the edge flips,
+    # and the permutation parity
+
+    if len(compactState) != 54:
+        return "The state has %d squares instead of 54" % len(compactState)
+    for index, code in enumerate(compactState):
+        if code >= RubiksColor.DEFAULT.value:
+            (face, row, col) = (Faces(index // 9), index // 3 % 3, index % 3)
+            return "The square at %s row %d column %d has no color" % (face.name.lower(), row, col)
+    for color in RubiksColor:
+        count = compactState.count(color.value)
+        if color != RubiksColor.DEFAULT and count != 9:
+            return "There are %d %s squares instead of 9" % (count, color.name.lower())
+
+    centers = [compactState[getIndex(face, 1, 1)] for face in Faces]
+    if len(set(centers)) != 6:
+        return "Two centers are the same color"
+
+    cubies = compactToCubies(compactState)
+    if cubies == None:
+        # Find the position that doesn't hold a real piece, to say which
+        faceOfColor = {code : face for face, code in enumerate(centers)}
+        for position, indices in enumerate(cornerIndices + edgeIndices):
+            faces = tuple([faceOfColor[compactState[index]] for index in indices])
+            if not any([faces[i:] + faces[:i] in cornerByFaces or faces[i:] + faces[:i] in edgeByFaces for i in range(len(faces))]):
+                name = Corners(position).name if position < 8 else Edges(position - 8).name
+                colors = ', '.join([colorsByCode[compactState[index]].name.lower() for index in indices])
+                return "The piece in position %s has colors %s, which no piece has" % (name, colors)
+        return "A piece isn't a real piece"
+
+    # Each piece matches the centers, but if the centers are in a mirror image of the real color scheme, so are the corners
+    for position, indices in enumerate(cornerIndices):
+        colors = tuple([compactState[index] for index in indices])
+        if colors not in schemeCorners:
+            names = ', '.join([colorsByCode[code].name.lower() for code in colors])
+            return "The corner in position %s has colors %s going around it, a mirror image of a real corner" % (Corners(position).name, names)
+
+    for pieces, names, kind in [(cubies.cp, Corners, "corner"), (cubies.ep, Edges, "edge")]:
+        for piece in range(len(pieces)):
+            if pieces.count(piece) != 1:
+                colors = ', '.join([colorsByCode[centers[face]].name.lower() for face in (cornerFaces if kind == "corner" else edgeFaces)[piece]])
+                return "There are %d %s %s pieces instead of 1" % (pieces.count(piece), colors, kind)
+
+    if sum(cubies.co) % 3 != 0:
+        return "A corner is twisted--the corner twists don't add up"
+    if sum(cubies.eo) % 2 != 0:
+        return "An edge is flipped--the edge flips don't add up"
+    if cubies.getCornerParity() != cubies.getEdgeParity():
+        return "Two pieces are swapped--the corner and edge permutations don't match"
+    return None
+
+def getCubieMove(permutation):
+    # Given the permutation of an action (see compilePermutation), returns it as a CubieCube
+    # Only valid for actions that don't move the centers--i.e. not whole-cube turns
+    solved = bytes([index // 9 for index in range(54)])
+    return compactToCubies(bytes([solved[index] for index in permutation]))
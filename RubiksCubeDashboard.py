@@ -0,0 +1,165 @@
+# Many cubes being solved at once, shown in a grid in one vpython canvas
+    # Each place in the grid is a DisplayRubiksCube of its own, drawn at an offset from the others
+    # All of them are animated on one clock: each frame, every cube in the middle of a move turns a step
+    # A cube that finishes its solution takes the next one waiting, so the grid keeps up with a batch solve
+    # Command line usage--solves one state string per line of a file (or standard input), as RubiksCubeBatch.py does,
+    # and shows each solution as soon as it's found:
+        # python RubiksCubeDashboard.py [file] [--workers N] [--cubes N] [--speed X]
+
+from vpython import *
+from RubiksCubeUtil import *
+from RubiksCube import RubiksCube
+from DisplayRubiksCube import DisplayRubiksCube
+import math
+import queue
+import threading
+
+class DashboardSlot:
+    # One place in the grid--its display, its caption, and the solution it's showing
+    _display = None
+    _label = None
+    _caption = ''
+    _moves = None
+    _position = 0
+    # Frames left in the pause after a move
+    _pauseFrames = 0
+
+    def __init__(self, display, label):
+        self._display = display
+        self._label = label
+        self._moves = []
+
+    def setSolution(self, startState, moves, caption = ''):
+        # Shows startState (a compact state), and starts playing moves from it
+        self._display.showState(startState)
+        self._caption = caption
+        self._moves = list(moves)
+        self._position = 0
+        self._pauseFrames = 0
+        self.updateLabel()
+
+    def updateLabel(self):
+        self._label.text = "%s %d/%d" % (self._caption, self._position, len(self._moves))
+
+    def isIdle(self):
+        # True once the solution has been shown through to the end
+        return self._position == len(self._moves) and self._pauseFrames == 0 and not self._display.isAnimating()
+
+    def step(self, pauseFrames):
+        # Advances by one frame, waiting pauseFrames frames after each move--returns True if still playing
+        if self._display.stepAction():
+            return True
+        if self._pauseFrames > 0:
+            self._pauseFrames -= 1
+            return True
+        if self._position < len(self._moves):
+            self._display.startAction(self._moves[self._position])
+            self._position += 1
+            self._pauseFrames = pauseFrames
+            self.updateLabel()
+            return True
+        return False
+
+class RubiksCubeDashboard:
+    # Parameters
+    _spacing = 5
+    _frameRate = DisplayRubiksCube._frameRate
+
+    # Multiplies the animation speed, as for DisplayRubiksCube.setSpeed
+    _speed = 1
+
+    _canvas = None
+    _slots = None
+
+    def __init__(self, count, columns = None, speed = 1, title = "Rubik's Cubes"):
+        # Lays out count solved cubes in a grid, columns across (about square if not given)
+        if columns == None:
+            columns = math.ceil(math.sqrt(count))
+        rows = math.ceil(count / columns)
+        self._canvas = canvas(title = title, width = 1000, height = 800)
+        self._canvas.center = vector((columns - 1) * self._spacing / 2, -(rows - 1) * self._spacing / 2, 0)
+        self._speed = speed
+
+        self._slots = []
+        for slot in range(count):
+            offset = ((slot % columns) * self._spacing, -(slot // columns) * self._spacing, 0)
+            display = DisplayRubiksCube(RubiksCube(stateToCompact(stateSolved()), recordMoves = False), attach = False, offset = offset, canvas = self._canvas)
+            caption = label(canvas = self._canvas, pos = vector(offset[0], offset[1] - self._spacing / 2 + 0.5, 0), text = '', box = False, height = 12)
+            self._slots.append(DashboardSlot(display, caption))
+
+    def setSpeed(self, speed):
+        self._speed = speed
+
+    def setSolution(self, slot, startState, moves, caption = ''):
+        # Shows startState (a compact state) at place slot in the grid, and starts playing moves from it
+        self._slots[slot].setSolution(startState, moves, caption)
+
+    def getIdleSlots(self):
+        return [index for index, slot in enumerate(self._slots) if slot.isIdle()]
+
+    def step(self):
+        # Advances every cube by one frame--returns True if any of them is still playing
+        # Waits as many frames between moves as DisplayRubiksCube.animateAction pauses for
+        pauseFrames = round(DisplayRubiksCube._pauseTime * self._frameRate)
+        playing = False
+        for slot in self._slots:
+            if slot.step(pauseFrames):
+                playing = True
+        return playing
+
+    def run(self, solutions):
+        # Plays solutions, a queue.Queue of (start compact state, moves, caption) ended by None, on the free places in the grid
+        # as they come--returns once the queue has ended and every cube has been shown solved
+        ended = False
+        while True:
+            for slot in self.getIdleSlots():
+                if ended:
+                    break
+                try:
+                    solution = solutions.get_nowait()
+                except queue.Empty:
+                    break
+                if solution == None:
+                    ended = True
+                    break
+                self.setSolution(slot, *solution)
+            if not self.step() and ended:
+                return
+            rate(self._frameRate * self._speed)
+
+    def play(self, solutions):
+        # Plays a list of (start compact state, moves, caption) (see run)
+        waiting = queue.Queue()
+        for solution in solutions:
+            waiting.put(solution)
+        waiting.put(None)
+        self.run(waiting)
+
+
+if __name__ == '__main__':
+    from RubiksCubeBatch import iterSolveMany
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description = "Solve one cube per line of state strings, showing the solutions in a grid")
+    parser.add_argument('file', nargs = '?', help = "file of state strings (default: standard input)")
+    parser.add_argument('--workers', type = int, default = None, help = "number of worker processes (default: one per CPU)")
+    parser.add_argument('--cubes', type = int, default = 9, help = "number of cubes in the grid (default: 9)")
+    parser.add_argument('--speed', type = float, default = 1, help = "animation speed (default: 1)")
+    args = parser.parse_args()
+
+    stateStrs = [line.strip() for line in (open(args.file) if args.file != None else sys.stdin) if line.strip() != '']
+    solutions = queue.Queue()
+
+    def solveAll():
+        # Solves in the background, passing each solution to the dashboard as it's found
+        for index, moves, seconds, problem in iterSolveMany(stateStrs, args.workers):
+            if moves == None:
+                print("#%d FAILED: %s" % (index, problem), flush = True)
+            else:
+                solutions.put((parseCompactState(stateStrs[index].replace(' ', '')), moves, "#%d" % index))
+        solutions.put(None)
+
+    threading.Thread(target = solveAll, daemon = True).start()
+    RubiksCubeDashboard(args.cubes, speed = args.speed).run(solutions)
+    print("Complete!")
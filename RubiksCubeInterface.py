@@ -1,4 +1,4 @@
-from DisplayRubiksCube import *
+# The display is loaded only if an animation is requested (see RubiksCube.createDisplay)
 from RubiksCube import *
 from RubiksCubeUtil import *
 
@@ -19,13 +19,49 @@ else:
     print("Enter the state:")
 
 stateStr = input().replace(' ', '')
-cube = RubiksCube(parseRubiksCubeState(stateStr))
-display = DisplayRubiksCube(cube)
 
-if cube.solve():
-    print("Complete! Enter 'stop' to end program.")
-else:
-    print("Failed to solve. You likely entered an illegal cube setup.")
-    
-while input("") != "stop":
-    pass
\ No newline at end of file
+# Check the state before asking anything else, so an illegal cube is caught right away
+try:
+    cube = RubiksCube(parseRubiksCubeState(stateStr))
+    problem = cube.validate()
+except ValueError as error:
+    problem = str(error)
+if problem != None:
+    print("Illegal cube setup: %s" % problem)
+    exit()
+
+showAnimationString = "Show animation? (y/n)\n"
+showAnimation = input(showAnimationString).lower() in ['y', 'yes']
+
+# Solve first at full speed--the animation is a replay of the moves afterwards
+startState = cube.getCompactState()
+if not cube.solve():
+    print("Failed to solve.")
+    exit()
+moves = cube.getMoveHistory()
+print(' '.join([action.name for action in moves]))
+print("Complete! %d moves" % len(moves))
+
+if showAnimation:
+    from RubiksCubePlayer import ReplayPlayer
+    player = ReplayPlayer(RubiksCube(startState).createDisplay(attach = False), startState, moves)
+    player.start()
+    print("Replaying. Enter 'pause', 'play', 'seek N' (show the cube after N moves), 'speed X' (e.g. 'speed 2' for twice as fast), or 'stop' to end program.")
+    while True:
+        command = input("").split()
+        if command == ['stop']:
+            break
+        elif command == ['pause']:
+            player.pause()
+        elif command == ['play']:
+            player.play()
+        elif len(command) == 2 and command[0] == 'seek' and command[1].isdigit():
+            player.seek(int(command[1]))
+        elif len(command) == 2 and command[0] == 'speed':
+            try:
+                player.setSpeed(float(command[1]))
+            except ValueError:
+                print("Speed should be a number")
+        elif command != []:
+            print("Unknown command")
+    player.stop()
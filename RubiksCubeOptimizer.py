@@ -0,0 +1,90 @@
+# Shortening of move sequences, e.g. a solution from RubiksCube.solve
+    # Moves of the same face are merged (U U U -> UP, F FP -> nothing, R R -> R2)
+    # Moves of opposite faces commute, so they're merged across each other too (U D UP -> D)
+    # Whole-cube turns are kept as they are, and nothing is merged across them
+    # The shortened sequence is checked to do exactly the same as the original
+
+from RubiksCubeUtil import *
+from RubiksCube import actionGathers
+
+# Clockwise, half turn, and counterclockwise move of each face
+clockwiseActions = {actionFaces[action] : action for action in halfTurnActions.values()}
+halfTurnFaceActions = {actionFaces[action] : action for action in halfTurnActions}
+counterClockwiseFaceActions = {actionFaces[action] : action for action in moveActions if action in counterClockwiseActions}
+
+def getQuarterTurns(action):
+    # Returns how many clockwise quarter turns of its face action is
+    if action in halfTurnActions:
+        return 2
+    return 3 if action in counterClockwiseActions else 1
+
+def mergeMoves(moves):
+    # Returns the merged sequence as a list of (face, clockwise quarter turns 1-3), or an Action for a whole-cube turn
+    # Each run of moves on one axis (a face and its opposite) between other moves holds at most one move of each face,
+    # in Faces order
+    merged = []
+    for action in moves:
+        face = actionFaces.get(action)
+        if face == None:
+            merged.append(action)
+            continue
+
+        # Look back over the run of moves on this axis at the end
+        index = len(merged) - 1
+        if index >= 0 and not isinstance(merged[index], Action) and merged[index][0] == oppositeFaces[face]:
+            index -= 1
+        if index >= 0 and not isinstance(merged[index], Action) and merged[index][0] == face:
+            turns = (merged[index][1] + getQuarterTurns(action)) % 4
+            if turns == 0:
+                del merged[index]
+            else:
+                merged[index] = (face, turns)
+        elif len(merged) > 0 and not isinstance(merged[-1], Action) and merged[-1][0] == oppositeFaces[face] and face.value < merged[-1][0].value:
+            merged.insert(len(merged) - 1, (face, getQuarterTurns(action)))
+        else:
+            merged.append((face, getQuarterTurns(action)))
+    return merged
+
+def doesSameAsMoves(moves1, moves2):
+    # Checks if two move sequences move every square to the same place, by doing both to a state of 54 different labels
+    state1 = bytes(range(54))
+    state2 = state1
+    for action in moves1:
+        state1 = bytes(actionGathers[action](state1))
+    for action in moves2:
+        state2 = bytes(actionGathers[action](state2))
+    return state1 == state2
+
+def optimizeMoves(moves, halfTurns = True):
+    # Returns a sequence of actions that does the same as moves, with same-face and opposite-face moves merged
+    # Half turns are written as half-turn actions (U2), or as two clockwise moves if halfTurns is False
+    # If the merged sequence somehow doesn't do the same as moves, moves is returned unchanged
+
+    optimized = []
+    for move in mergeMoves(moves):
+        if isinstance(move, Action):
+            optimized.append(move)
+            continue
+        (face, turns) = move
+        if turns == 1:
+            optimized.append(clockwiseActions[face])
+        elif turns == 3:
+            optimized.append(counterClockwiseFaceActions[face])
+        elif halfTurns:
+            optimized.append(halfTurnFaceActions[face])
+        else:
+            optimized.extend([clockwiseActions[face], clockwiseActions[face]])
+
+    if not doesSameAsMoves(moves, optimized):
+        return list(moves)
+    return optimized
+
+
+if __name__ == '__main__':
+    import sys
+
+    # Shortens a move sequence given as names, e.g. python RubiksCubeOptimizer.py U U U R L RP
+    moves = [Action[name] for name in sys.argv[1:]]
+    optimized = optimizeMoves(moves)
+    print(' '.join([action.name for action in optimized]))
+    print("%d moves -> %d" % (len(moves), len(optimized)))
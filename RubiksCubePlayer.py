@@ -0,0 +1,137 @@
+# Replaying moves on a display in a thread of its own, so solving never waits for the animation
+    # The moves are found first at full speed (e.g. by RubiksCube.solve), then handed to a ReplayPlayer
+    # with the state they start from
+    # While it plays, the replay can be paused, resumed, moved to any point in the moves, and sped up or slowed down
+    # The display is anything with:
+        # animateAction(action)--animates one move
+        # showState(compactState)--shows a state straight away, without animating
+        # setSpeed(speed)--animation speed, 1 for normal
+    # DisplayRubiksCube works as one, created with attach = False (see RubiksCube.createDisplay)
+
+from RubiksCubeUtil import *
+from RubiksCube import actionGathers
+import threading
+
+class ReplayPlayer:
+    _display = None
+    _moves = None
+    # _states[i] is the compact state after the first i moves
+    _states = None
+
+    # Replay position--the number of moves shown so far
+    _position = 0
+    _playing = False
+    _stopped = False
+    _speed = 1
+    # _animating is True while the replay thread animates a move
+    # _sought is set if the position is changed meanwhile, so the display is reset once the move is done
+    _animating = False
+    _sought = False
+
+    # Guards the variables above, and wakes the replay thread when they change
+    _condition = None
+    _thread = None
+
+    def __init__(self, display, startState, moves, speed = 1):
+        # startState is the compact state before moves
+        self._display = display
+        self._moves = list(moves)
+        self._states = [bytes(startState)]
+        for action in self._moves:
+            self._states.append(bytes(actionGathers[action](self._states[-1])))
+        self._speed = speed
+        self._condition = threading.Condition()
+
+    def start(self, playing = True):
+        # Shows the start state and starts the replay thread--paused unless playing is True
+        self._display.setSpeed(self._speed)
+        self._display.showState(self._states[0])
+        self._playing = playing
+        self._thread = threading.Thread(target = self.run, daemon = True)
+        self._thread.start()
+
+
+    # Controls--safe to call from any thread
+    # A move being animated is finished before a control takes effect
+
+    def play(self):
+        # Plays from the current position (from the start again if it's at the end)
+        with self._condition:
+            if self._position == len(self._moves):
+                self._position = 0
+                self._display.showState(self._states[0])
+            self._playing = True
+            self._condition.notify_all()
+
+    def pause(self):
+        with self._condition:
+            self._playing = False
+            self._condition.notify_all()
+
+    def seek(self, position):
+        # Shows the state after the first position moves, and carries on playing from there if playing
+        # Seeking to the end (or past it) stops playing, as reaching it does
+        with self._condition:
+            self._position = max(0, min(position, len(self._moves)))
+            if self._position == len(self._moves):
+                self._playing = False
+            if self._animating:
+                self._sought = True
+            else:
+                self._display.showState(self._states[self._position])
+            self._condition.notify_all()
+
+    def setSpeed(self, speed):
+        # speed multiplies the animation speed--2 plays twice as fast
+        with self._condition:
+            self._speed = speed
+            self._display.setSpeed(speed)
+
+    def stop(self):
+        # Ends the replay thread
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread != None and self._thread != threading.current_thread():
+            self._thread.join()
+
+    def getPosition(self):
+        return self._position
+
+    def getMoves(self):
+        return list(self._moves)
+
+    def isPlaying(self):
+        return self._playing
+
+    def waitUntilFinished(self, timeout = None):
+        # Blocks until the replay reaches the end of the moves (or is stopped)
+        # Returns True if it did, False if timeout seconds passed first
+        with self._condition:
+            return self._condition.wait_for(lambda: self._stopped or (self._position == len(self._moves) and not self._playing), timeout)
+
+
+    # Replay thread
+
+    def run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._stopped or (self._playing and self._position < len(self._moves)))
+                if self._stopped:
+                    return
+                action = self._moves[self._position]
+                self._animating = True
+
+            # Animate without holding the lock, so controls don't wait for the animation
+            self._display.animateAction(action)
+
+            with self._condition:
+                self._animating = False
+                if self._sought:
+                    self._sought = False
+                    self._display.showState(self._states[self._position])
+                else:
+                    self._position += 1
+                if self._position == len(self._moves):
+                    self._playing = False
+                self._condition.notify_all()
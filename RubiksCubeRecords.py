@@ -0,0 +1,308 @@
+# Binary files of cube states and their solutions, for collections of cubes too big to keep as text
+    # Layout (integers are little-endian):
+        # Header, 32 bytes: magic b'RCRB', version (u16), flags (u16), record count (u64),
+        # max moves (u16), state bytes (u16), move bytes (u16), record size (u16), then zeros
+            # flags: PACKED if states and moves are packed into bits, SOLUTIONS if records have solutions
+        # Then record count records of record size bytes each:
+            # state--the 54 color codes of a compact state, 3 bits each (21 bytes), or a byte each if not PACKED
+            # With SOLUTIONS:
+                # move count (u16)--NO_SOLUTION if the cube wasn't solved
+                # moves--up to max moves Action values, 5 bits each, or a byte each if not PACKED, padded with zeros
+    # Packed files are smallest--21 bytes a state, against 55 for a line of text
+    # Unpacked files can be used in place: their records are read straight from the file as NumPy arrays, and the states of an
+    # unpacked file without solutions go into a RubiksCubeArray without being copied (see RecordFile.getCubes)
+    # Files are mapped into memory, so any record can be read without reading the ones before it
+    # Requires NumPy
+    # Command line usage:
+        # python RubiksCubeRecords.py pack states.txt states.rcr [--unpacked]--writes a file of the state strings in a text file,
+        # reporting and skipping any line that isn't one
+        # python RubiksCubeRecords.py solve states.rcr solutions.rcr [--workers N] [--max-moves N] [--unpacked]
+        # python RubiksCubeRecords.py dump file.rcr [--start N] [--count N]--prints records as text
+
+from RubiksCubeUtil import *
+import mmap
+import os
+import struct
+import numpy as np
+
+magic = b'RCRB'
+version = 1
+headerFormat = '<4sHHQHHHH8x'
+headerSize = struct.calcsize(headerFormat)
+
+# flags
+PACKED = 1
+SOLUTIONS = 2
+
+# Move count of a record whose cube wasn't solved
+NO_SOLUTION = 0xffff
+
+# Bits for each color code (0-6) and each Action value (0-21) when packed
+colorBits = 3
+actionBits = 5
+
+# Records are packed and written this many at a time
+chunkSize = 65536
+
+def getRecordLayout(flags, maxMoves):
+    # Returns (state bytes, move bytes, NumPy dtype of a record)
+    packed = flags & PACKED
+    stateBytes = (54 * colorBits + 7) // 8 if packed else 54
+    moveBytes = 0
+    fields = [('state', np.uint8, (stateBytes,))]
+    if flags & SOLUTIONS:
+        moveBytes = (maxMoves * actionBits + 7) // 8 if packed else maxMoves
+        fields.append(('moveCount', '<u2'))
+        fields.append(('moves', np.uint8, (moveBytes,)))
+    return (stateBytes, moveBytes, np.dtype(fields))
+
+def packCodes(codes, bits):
+    # Packs an (N, k) array of values below 2**bits into an (N, bytes) array, bits bits each, first value in the high bits
+    codes = np.asarray(codes, dtype = np.uint8)
+    bitArray = np.unpackbits(codes[:, :, np.newaxis], axis = 2)[:, :, 8 - bits:]
+    return np.packbits(bitArray.reshape(len(codes), -1), axis = 1)
+
+def unpackCodes(packed, count, bits):
+    # The reverse of packCodes--returns an (N, count) array of uint8
+    bitArray = np.unpackbits(packed, axis = 1)[:, :count * bits].reshape(len(packed), count, bits)
+    weights = (1 << np.arange(bits - 1, -1, -1)).astype(np.uint8)
+    return (bitArray * weights).sum(axis = 2, dtype = np.uint8)
+
+
+class RecordWriter:
+    # Writes a record file a chunk of records at a time, so it never holds more than a chunk in memory
+    # The record count in the header is filled in by close
+    _file = None
+    _flags = 0
+    _maxMoves = 0
+    _dtype = None
+    _count = 0
+    # Records waiting to be written: (compact state, moves or None)
+    _waiting = None
+
+    def __init__(self, path, solutions = False, maxMoves = 255, packed = True):
+        # If solutions is True, each record has a move list of at most maxMoves moves
+        self._flags = (PACKED if packed else 0) | (SOLUTIONS if solutions else 0)
+        self._maxMoves = maxMoves if solutions else 0
+        (_, _, self._dtype) = getRecordLayout(self._flags, self._maxMoves)
+        self._waiting = []
+        self._file = open(path, 'wb')
+        self.writeHeader()
+
+    def writeHeader(self):
+        (stateBytes, moveBytes, dtype) = getRecordLayout(self._flags, self._maxMoves)
+        self._file.write(struct.pack(headerFormat, magic, version, self._flags, self._count, self._maxMoves, stateBytes, moveBytes, dtype.itemsize))
+
+    def write(self, compactState, moves = None):
+        # Adds a record--moves is a list of Actions, or None if the cube wasn't solved (ignored without solutions)
+        if self._flags & SOLUTIONS and moves != None and len(moves) > self._maxMoves:
+            raise ValueError("The solution has %d moves, more than the file's %d" % (len(moves), self._maxMoves))
+        self._waiting.append((compactState, moves))
+        if len(self._waiting) == chunkSize:
+            self.flush()
+
+    def writeStates(self, states):
+        # Adds a record for each row of an (N, 54) array of compact states, e.g. RubiksCubeArray.getStates()
+        self.flush()
+        states = np.asarray(states, dtype = np.uint8).reshape(-1, 54)
+        for start in range(0, len(states), chunkSize):
+            self.writeChunk(states[start:start + chunkSize], None)
+
+    def flush(self):
+        if len(self._waiting) == 0:
+            return
+        states = np.frombuffer(b''.join([bytes(state) for state, _ in self._waiting]), dtype = np.uint8).reshape(-1, 54)
+        solutions = [moves for _, moves in self._waiting] if self._flags & SOLUTIONS else None
+        self.writeChunk(states, solutions)
+        self._waiting = []
+
+    def writeChunk(self, states, solutions):
+        # Writes an (N, 54) array of states, with solutions (a list of N move lists or None) if the file has them
+        records = np.zeros(len(states), dtype = self._dtype)
+        records['state'] = packCodes(states, colorBits) if self._flags & PACKED else states
+        if self._flags & SOLUTIONS:
+            moveValues = np.zeros((len(states), self._maxMoves), dtype = np.uint8)
+            for i, moves in enumerate(solutions if solutions != None else [None] * len(states)):
+                if moves == None:
+                    records['moveCount'][i] = NO_SOLUTION
+                else:
+                    records['moveCount'][i] = len(moves)
+                    moveValues[i, :len(moves)] = [action.value for action in moves]
+            if self._maxMoves > 0:
+                records['moves'] = packCodes(moveValues, actionBits) if self._flags & PACKED else moveValues
+        self._file.write(records.tobytes())
+        self._count += len(states)
+
+    def getCount(self):
+        # Returns the number of records written so far
+        return self._count + len(self._waiting)
+
+    def close(self):
+        # Writes any records left, and the record count in the header
+        self.flush()
+        self._file.seek(0)
+        self.writeHeader()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+def writeRecords(path, states, solutions = None, maxMoves = 255, packed = True):
+    # Writes a record file of compact states, with their solutions if given (a list of move lists or None, one per state)
+    # Returns the number of records written
+    with RecordWriter(path, solutions != None, maxMoves, packed) as writer:
+        for i, compactState in enumerate(states):
+            writer.write(compactState, solutions[i] if solutions != None else None)
+        return writer.getCount()
+
+
+class RecordFile:
+    # A record file mapped into memory, for reading records in any order
+    # Arrays returned for an unpacked file are views of the file--let go of them before closing it
+    _file = None
+    _map = None
+    _flags = 0
+    _maxMoves = 0
+    _count = 0
+    # Every record, as a NumPy structured array over the mapped file (see getRecordLayout)
+    _records = None
+
+    def __init__(self, path):
+        # Raises ValueError if path isn't a whole record file of this version--the file is closed again first
+        self._file = open(path, 'rb')
+        try:
+            if os.fstat(self._file.fileno()).st_size < headerSize:
+                raise ValueError("%s is too short to be a record file" % path)
+            self._map = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+            (fileMagic, fileVersion, self._flags, self._count, self._maxMoves, stateBytes, moveBytes, recordSize) = struct.unpack_from(headerFormat, self._map)
+            if fileMagic != magic:
+                raise ValueError("%s isn't a record file" % path)
+            if fileVersion != version:
+                raise ValueError("%s is version %d of the record format, not %d" % (path, fileVersion, version))
+            (_, _, dtype) = getRecordLayout(self._flags, self._maxMoves)
+            if dtype.itemsize != recordSize or len(self._map) < headerSize + self._count * recordSize:
+                raise ValueError("%s is damaged or cut short" % path)
+        except ValueError:
+            # Nothing is viewing the map yet, so it can be closed
+            if self._map != None:
+                self._map.close()
+            self._file.close()
+            raise
+        self._records = np.frombuffer(self._map, dtype = dtype, count = self._count, offset = headerSize)
+
+    def __len__(self):
+        return self._count
+
+    def isPacked(self):
+        return bool(self._flags & PACKED)
+
+    def hasSolutions(self):
+        return bool(self._flags & SOLUTIONS)
+
+    def getRecords(self, start = 0, stop = None):
+        # Returns records start to stop as a NumPy structured array (a view of the file)
+        return self._records[start:stop]
+
+    def getStates(self, start = 0, stop = None):
+        # Returns the states of records start to stop as an (N, 54) uint8 array of compact states
+        # For an unpacked file this is a view of the file, not a copy
+        states = self._records['state'][start:stop]
+        if self._flags & PACKED:
+            return unpackCodes(states, 54, colorBits)
+        return states
+
+    def getCubes(self, start = 0, stop = None):
+        # Returns the states of records start to stop as a RubiksCubeArray
+        # The states of an unpacked file without solutions are used from the file without copying
+        from RubiksCubeArray import RubiksCubeArray
+        return RubiksCubeArray(self.getStates(start, stop))
+
+    def getCompactState(self, index):
+        return self.getStates(index, index + 1)[0].tobytes()
+
+    def getMoves(self, index):
+        # Returns the solution of record index as a list of Actions, or None if the cube wasn't solved
+        if not self._flags & SOLUTIONS:
+            raise ValueError("The file has no solutions")
+        record = self._records[index]
+        count = int(record['moveCount'])
+        if count == NO_SOLUTION:
+            return None
+        if self._flags & PACKED:
+            values = unpackCodes(record['moves'][np.newaxis], self._maxMoves, actionBits)[0]
+        else:
+            values = record['moves']
+        return [Action(int(value)) for value in values[:count]]
+
+    def close(self):
+        self._records = None
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description = "Write, solve, and read binary files of cube states")
+    commands = parser.add_subparsers(dest = 'command', required = True)
+    pack = commands.add_parser('pack', help = "write a record file of the state strings in a text file, one per line")
+    pack.add_argument('input')
+    pack.add_argument('output')
+    pack.add_argument('--unpacked', action = 'store_true', help = "a byte per square instead of 3 bits")
+    solve = commands.add_parser('solve', help = "solve the states in a record file, writing them with their solutions")
+    solve.add_argument('input')
+    solve.add_argument('output')
+    solve.add_argument('--workers', type = int, default = None, help = "number of worker processes (default: one per CPU)")
+    solve.add_argument('--max-moves', type = int, default = 255, help = "most moves a solution can have (default: 255)")
+    solve.add_argument('--unpacked', action = 'store_true', help = "a byte per square and move instead of packed bits")
+    dump = commands.add_parser('dump', help = "print records as text: state string, then the solution if there is one")
+    dump.add_argument('input')
+    dump.add_argument('--start', type = int, default = 0)
+    dump.add_argument('--count', type = int, default = None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'pack':
+        # Lines that aren't state strings are reported and left out, as SolveRubiksCubes reports them without stopping
+        skipped = 0
+        with open(args.input) as inputFile, RecordWriter(args.output, packed = not args.unpacked) as writer:
+            for lineNumber, line in enumerate(inputFile, 1):
+                if line.strip() == '':
+                    continue
+                try:
+                    compactState = parseCompactState(line.strip().replace(' ', ''))
+                except ValueError as error:
+                    print("Skipped line %d: %s" % (lineNumber, error), file = sys.stderr)
+                    skipped += 1
+                    continue
+                writer.write(compactState)
+            print("Wrote %d records in %.1f seconds" % (writer.getCount(), time.perf_counter() - start) + (", skipped %d lines" % skipped if skipped > 0 else ''))
+    elif args.command == 'solve':
+        from RubiksCubeBatch import iterSolveMany
+        with RecordFile(args.input) as records:
+            stateStrs = (compactToStateString(records.getCompactState(index)) for index in range(len(records)))
+            with RecordWriter(args.output, solutions = True, maxMoves = args.max_moves, packed = not args.unpacked) as writer:
+                for index, moves, seconds, problem in iterSolveMany(stateStrs, args.workers, ordered = True):
+                    # A solution too long for the file is recorded as no solution
+                    writer.write(records.getCompactState(index), moves if moves == None or len(moves) <= args.max_moves else None)
+                print("Solved %d records in %.1f seconds" % (writer.getCount(), time.perf_counter() - start))
+    else:
+        with RecordFile(args.input) as records:
+            stop = len(records) if args.count == None else min(len(records), args.start + args.count)
+            for index in range(args.start, stop):
+                line = compactToStateString(records.getCompactState(index))
+                if records.hasSolutions():
+                    moves = records.getMoves(index)
+                    line += ' ' + ('FAILED' if moves == None else ' '.join([action.name for action in moves]))
+                print(line)
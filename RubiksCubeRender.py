@@ -0,0 +1,316 @@
+# Geometry of the drawn cube, and rendering of solutions to image files without a display
+    # The geometry is shared with DisplayRubiksCube, which draws it live with vpython--nothing here needs vpython
+    # Frames are drawn by projecting each square onto the image and filling it (painter's algorithm), and written as
+    # SVG (plain text) or PNG (rasterized with NumPy, written with zlib)--no display, browser, or image library is needed
+    # Frame files are numbered in order, so a video can be made from them with e.g.:
+        # ffmpeg -framerate 30 -i frames/frame%05d.png solve.mp4
+    # Command line usage--renders the solution of one state string:
+        # python RubiksCubeRender.py state --output frames [--format png|svg] [--size N] [--workers N]
+
+from RubiksCubeUtil import *
+import math
+import os
+import re
+import struct
+import zlib
+
+# Thickness of each square's box in DisplayRubiksCube
+thin = 0.1
+
+def getDisplaySpecs(face, row, col):
+    # Given cube coordinates, returns tuple consisting of: (length, height, width, x, y, z)
+    # The cube's center is at the origin, with the top toward +z, the front toward -y, and the right toward +x
+
+    if face == Faces.TOP:
+        return (1, 1, thin, col - 1, -(row - 1), 1.5)
+    if face == Faces.FRONT:
+        return (1, thin, 1, col - 1, -1.5, -(row - 1))
+    if face == Faces.RIGHT:
+        return (thin, 1, 1, 1.5, col - 1, -(row - 1))
+    if face == Faces.BACK:
+        return (1, thin, 1, -(col - 1), 1.5, -(row - 1))
+    if face == Faces.LEFT:
+        return (thin, 1, 1, -1.5, -(col - 1), -(row - 1))
+    if face == Faces.BOTTOM:
+        return (1, 1, thin, col - 1, (row - 1), -1.5)
+
+# Outward direction of each face, as laid out by getDisplaySpecs
+faceNormals = {
+    Faces.TOP : (0, 0, 1),
+    Faces.FRONT : (0, -1, 0),
+    Faces.RIGHT : (1, 0, 0),
+    Faces.BACK : (0, 1, 0),
+    Faces.LEFT : (-1, 0, 0),
+    Faces.BOTTOM : (0, 0, -1)
+}
+
+def getAnimationSpecs():
+    # Returns a dictionary from each action to (axis, indices of the squares that turn, quarter turns)
+    # A face move turns the squares in the outer layer of its face, about the axis pointing into the face for clockwise
+    # A whole-cube turn turns every square, about the axis of the U move (TCW, TCCW) or the R move (TF, TB)
+    # Turns follow the right-hand rule about the axis, as vpython's rotate does
+    specs = {}
+    for action in Action:
+        if action in turnActions:
+            face = Faces.TOP if action in [Action.TCW, Action.TCCW] else Faces.RIGHT
+            indices = tuple(range(54))
+        else:
+            face = actionFaces[action]
+            normal = faceNormals[face]
+            indices = []
+            for squareFace in Faces:
+                for (row, col) in getAllPoints():
+                    position = getDisplaySpecs(squareFace, row, col)[3:]
+                    if sum([p * n for p, n in zip(position, normal)]) >= 1:
+                        indices.append(getIndex(squareFace, row, col))
+            indices = tuple(indices)
+        sign = 1 if action in counterClockwiseActions else -1
+        axis = tuple([sign * n for n in faceNormals[face]])
+        specs[action] = (axis, indices, 2 if action in halfTurnActions else 1)
+    return specs
+
+animationSpecs = getAnimationSpecs()
+
+
+# Rendering
+
+# Colors of the squares, as (red, green, blue)
+colorsRGB = {
+    RubiksColor.RED : (200, 16, 46),
+    RubiksColor.GREEN : (0, 155, 72),
+    RubiksColor.BLUE : (0, 70, 173),
+    RubiksColor.WHITE : (255, 255, 255),
+    RubiksColor.YELLOW : (255, 213, 0),
+    RubiksColor.ORANGE : (255, 88, 0),
+    RubiksColor.DEFAULT : (128, 128, 128)
+}
+backgroundRGB = (235, 235, 235)
+bodyRGB = (20, 20, 20)
+
+# Fraction of each square's width that's colored--the rest is the black body showing between squares
+stickerSize = 0.88
+
+# Direction the cube is seen from (looking at the top, front, and right), and the image's up direction
+viewDirection = (0.55, -0.75, 0.45)
+viewUp = (0, 0, 1)
+
+def normalize(v):
+    length = math.sqrt(sum([x * x for x in v]))
+    return tuple([x / length for x in v])
+
+def cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+def dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def rotatePoint(point, axis, angle):
+    # Turns point about axis (through the origin) by angle, following the right-hand rule (Rodrigues' formula)
+    (cos, sin) = (math.cos(angle), math.sin(angle))
+    k = normalize(axis)
+    kCrossPoint = cross(k, point)
+    kDotPoint = dot(k, point)
+    return tuple([point[i] * cos + kCrossPoint[i] * sin + k[i] * kDotPoint * (1 - cos) for i in range(3)])
+
+def getSquareQuads():
+    # Returns (center, normal, first edge, second edge) for each square, in getIndex order
+    # The corners of the square are center +- edge1/2 +- edge2/2
+    quads = []
+    for face in Faces:
+        normal = faceNormals[face]
+        (edge1, edge2) = [tuple([1 if i == axis else 0 for i in range(3)]) for axis in range(3) if normal[axis] == 0]
+        for (row, col) in getAllPoints():
+            quads.append((getDisplaySpecs(face, row, col)[3:], normal, edge1, edge2))
+    return quads
+
+squareQuads = getSquareQuads()
+
+def getFrameShapes(compactState, action = None, fraction = 0):
+    # Returns the polygons to draw for one frame, back to front: a list of (color, corners) with corners in 3-d
+    # If action is given, the frame is fraction (0 to 1) of the way through it, starting from compactState
+    (axis, indices, quarterTurns) = animationSpecs[action] if action != None else ((0, 0, 1), (), 0)
+    angle = fraction * quarterTurns * math.pi / 2
+    turning = set(indices)
+
+    # Squares (a black backing and the colored sticker on it), each facing out from its face
+    pieces = []
+    for index, (center, normal, edge1, edge2) in enumerate(squareQuads):
+        pieces.append((center, normal, edge1, edge2, colorsRGB[colorsByCode[compactState[index]]], index in turning))
+
+    # When a face layer is partly turned, the inside of the cube shows at the cut--cover it with black on both sides
+    if action != None and action not in turnActions and 0 < fraction < 1:
+        normal = faceNormals[actionFaces[action]]
+        (edge1, edge2) = [tuple([3 if i == axis else 0 for i in range(3)]) for axis in range(3) if normal[axis] == 0]
+        cut = tuple([n * 0.5 for n in normal])
+        pieces.append((cut, tuple([-n for n in normal]), edge1, edge2, None, True))
+        pieces.append((cut, normal, edge1, edge2, None, False))
+
+    shapes = []
+    for center, normal, edge1, edge2, rgb, turns in pieces:
+        if turns and angle != 0:
+            (center, normal, edge1, edge2) = [rotatePoint(v, axis, angle) for v in (center, normal, edge1, edge2)]
+        # Skip squares facing away
+        if dot(normal, viewDirection) <= 0:
+            continue
+        depth = dot(center, viewDirection)
+        corners = [tuple([center[i] + (a * edge1[i] + b * edge2[i]) / 2 for i in range(3)]) for (a, b) in [(1, 1), (-1, 1), (-1, -1), (1, -1)]]
+        shapes.append((depth, 0, bodyRGB, corners))
+        if rgb != None:
+            sticker = [tuple([center[i] + (corner[i] - center[i]) * stickerSize for i in range(3)]) for corner in corners]
+            shapes.append((depth, 1, rgb, sticker))
+    shapes.sort(key = lambda shape: (shape[0], shape[1]))
+    return [(rgb, corners) for (_, _, rgb, corners) in shapes]
+
+def projectShapes(shapes, size):
+    # Projects the corners of each shape to pixel coordinates in a size x size image, with the cube filling most of it
+    view = normalize(viewDirection)
+    right = normalize(cross(viewUp, view))
+    up = cross(view, right)
+    scale = size / 6.2
+    return [(rgb, [(size / 2 + dot(corner, right) * scale, size / 2 - dot(corner, up) * scale) for corner in corners]) for (rgb, corners) in shapes]
+
+def getSVG(shapes, size):
+    # Returns the text of an SVG image of projected shapes
+    lines = ['<svg xmlns="http://www.w3.org/2000/svg" width="%d" height="%d" viewBox="0 0 %d %d">' % (size, size, size, size)]
+    lines.append('<rect width="%d" height="%d" fill="rgb(%d,%d,%d)"/>' % ((size, size) + backgroundRGB))
+    for rgb, corners in shapes:
+        points = ' '.join(['%.2f,%.2f' % corner for corner in corners])
+        lines.append('<polygon points="%s" fill="rgb(%d,%d,%d)"/>' % ((points,) + rgb))
+    lines.append('</svg>')
+    return '\n'.join(lines) + '\n'
+
+def rasterize(shapes, size):
+    # Returns a size x size x 3 NumPy array of the projected shapes, filled in order
+    # A pixel is in a shape if its center is on the inner side of every edge (the shapes are convex)
+    import numpy as np
+
+    image = np.empty((size, size, 3), dtype = np.uint8)
+    image[:, :] = backgroundRGB
+    for rgb, corners in shapes:
+        xs = [x for (x, y) in corners]
+        ys = [y for (x, y) in corners]
+        (left, right) = (max(int(min(xs)), 0), min(int(math.ceil(max(xs))), size))
+        (top, bottom) = (max(int(min(ys)), 0), min(int(math.ceil(max(ys))), size))
+        if left >= right or top >= bottom:
+            continue
+        (py, px) = np.mgrid[top:bottom, left:right] + 0.5
+        # Corners go around the shape one way or the other--a pixel is inside if it's on the same side of all edges
+        signs = []
+        for i in range(len(corners)):
+            (x1, y1) = corners[i]
+            (x2, y2) = corners[(i + 1) % len(corners)]
+            signs.append((x2 - x1) * (py - y1) - (y2 - y1) * (px - x1))
+        inside = np.logical_or(np.all([s >= 0 for s in signs], axis = 0), np.all([s <= 0 for s in signs], axis = 0))
+        image[top:bottom, left:right][inside] = rgb
+    return image
+
+def getPNG(image):
+    # Returns the bytes of a PNG file of an RGB image (a height x width x 3 array of uint8)
+    (height, width, _) = image.shape
+    rows = b''.join([b'\x00' + image[row].tobytes() for row in range(height)])
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) + chunk(b'IDAT', zlib.compress(rows, 6)) + chunk(b'IEND', b'')
+
+def writeFrame(path, compactState, action, fraction, size, format):
+    shapes = projectShapes(getFrameShapes(compactState, action, fraction), size)
+    if format == 'svg':
+        with open(path, 'w') as file:
+            file.write(getSVG(shapes, size))
+    else:
+        with open(path, 'wb') as file:
+            file.write(getPNG(rasterize(shapes, size)))
+
+
+# Exporting a solution
+
+frameFormats = ['png', 'svg']
+# Names of the files exportFrames writes, in any of frameFormats
+framePattern = re.compile(r'frame\d{5}\.(%s)' % '|'.join(frameFormats))
+
+def getMoveFrames(action, steps, holdFrames):
+    # Number of frames for one move: steps for each quarter turn, then holdFrames of the finished move
+    return steps * animationSpecs[action][2] + holdFrames
+
+def renderMoves(directory, states, moves, firstMove, lastMove, firstFrame, size, format, steps, holdFrames):
+    # Writes the frames of moves[firstMove:lastMove], numbered from firstFrame--states[i] is the state before moves[i]
+    # Returns the number of frames written
+    frame = firstFrame
+    for i in range(firstMove, lastMove):
+        for step in range(getMoveFrames(moves[i], steps, holdFrames)):
+            fraction = min((step + 1) / (steps * animationSpecs[moves[i]][2]), 1)
+            writeFrame(os.path.join(directory, 'frame%05d.%s' % (frame, format)), states[i], moves[i], fraction, size, format)
+            frame += 1
+    return frame - firstFrame
+
+def renderMoveRange(arguments):
+    # Worker function for exportFrames (takes one tuple, for Pool.imap_unordered)
+    return renderMoves(*arguments)
+
+def exportFrames(compactState, moves, directory, format = 'png', size = 400, steps = 10, holdFrames = 3, workers = 1):
+    # Writes the animation of moves done from compactState as numbered image files in directory:
+        # frame00000 is compactState, then each move takes steps frames for each quarter turn, and holds for holdFrames
+    # format is one of frameFormats
+    # With more than one worker, ranges of moves are rendered in parallel worker processes--the frame numbers are
+    # worked out beforehand, so the files are the same either way
+    # Frame files already in directory (from an earlier export) are removed first, so a shorter solution doesn't end with
+    # the last frames of a longer one--other files are left alone
+    # Returns the number of frames written
+    from RubiksCube import actionGathers
+    import multiprocessing
+
+    if format not in frameFormats:
+        raise ValueError("Unknown frame format: %s" % format)
+    os.makedirs(directory, exist_ok = True)
+    for name in os.listdir(directory):
+        if framePattern.fullmatch(name) != None:
+            os.remove(os.path.join(directory, name))
+
+    moves = list(moves)
+    states = [bytes(compactState)]
+    for action in moves:
+        states.append(bytes(actionGathers[action](states[-1])))
+    writeFrame(os.path.join(directory, 'frame%05d.%s' % (0, format)), states[0], None, 0, size, format)
+
+    # First frame of each move
+    firstFrames = [1]
+    for action in moves:
+        firstFrames.append(firstFrames[-1] + getMoveFrames(action, steps, holdFrames))
+
+    # A few ranges per worker, so they finish at about the same time
+    rangeCount = min(len(moves), max(workers, 1) * 4)
+    bounds = [round(len(moves) * i / rangeCount) for i in range(rangeCount + 1)] if rangeCount > 0 else [0]
+    ranges = [(directory, states, moves, bounds[i], bounds[i + 1], firstFrames[bounds[i]], size, format, steps, holdFrames) for i in range(len(bounds) - 1)]
+    if workers <= 1:
+        written = sum([renderMoveRange(arguments) for arguments in ranges])
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            written = sum(pool.imap_unordered(renderMoveRange, ranges))
+    return written + 1
+
+
+if __name__ == '__main__':
+    from RubiksCube import RubiksCube
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description = "Render the solution of a cube as numbered image files, without a display")
+    parser.add_argument('state', help = "state string (see parseRubiksCubeState)")
+    parser.add_argument('--output', '-o', default = 'frames', help = "directory to write frames to (default: frames)")
+    parser.add_argument('--format', choices = frameFormats, default = 'png')
+    parser.add_argument('--size', type = int, default = 400, help = "width and height of each frame in pixels (default: 400)")
+    parser.add_argument('--steps', type = int, default = 10, help = "frames for each quarter turn (default: 10)")
+    parser.add_argument('--workers', type = int, default = 1, help = "number of worker processes (default: 1)")
+    args = parser.parse_args()
+
+    cube = RubiksCube(parseCompactState(args.state.replace(' ', '')))
+    startState = cube.getCompactState()
+    if not cube.solve():
+        sys.exit(1)
+    moves = cube.getMoveHistory()
+    start = time.perf_counter()
+    frames = exportFrames(startState, moves, args.output, args.format, args.size, args.steps, workers = args.workers)
+    print("Wrote %d frames of %d moves to %s in %.1f seconds" % (frames, len(moves), args.output, time.perf_counter() - start))
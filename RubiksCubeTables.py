@@ -0,0 +1,120 @@
+# Storage of solver lookup tables in a binary file
+    # Tables are loaded with a read-only mmap, so every process using the same file shares one copy in the page cache
+    # File layout:
+        # Header: magic, format version, table version, byte order of the data, number of tables
+        # Directory: for each table--name, array typecode, offset of its data and number of items
+        # Data: each table's items in the recorded byte order, starting on an 8-byte boundary
+    # Build the two-phase solver's tables with:
+        # python RubiksCubeTables.py [path]
+
+from array import array
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b'RCTB'
+FORMAT_VERSION = 1
+
+# magic, format version, table version, byte order ('<' or '>'), number of tables
+HEADER = struct.Struct('<4sIIcxxxI')
+# name, typecode, offset, number of items
+ENTRY_NAME_SIZE = 32
+ENTRY = struct.Struct('<%dsc7xQQ' % ENTRY_NAME_SIZE)
+
+ALIGNMENT = 8
+
+def getTypecode(table):
+    # bytearrays and bytes are stored as unsigned bytes, arrays with their own typecode
+    return table.typecode if isinstance(table, array) else 'B'
+
+def writeTables(path, tables, tableVersion):
+    # Writes a dictionary of table name to array/bytearray to path
+    # tableVersion identifies the contents--loadTables rejects files with a different one
+    # Writes to a temporary file first, so other processes never see a partly written file
+    # Raises ValueError if a name doesn't fit in its directory entry (32 bytes of UTF-8)
+
+    for name in tables:
+        if len(name.encode()) > ENTRY_NAME_SIZE:
+            raise ValueError("Table name %r is longer than %d bytes" % (name, ENTRY_NAME_SIZE))
+
+    byteOrder = b'<' if sys.byteorder == 'little' else b'>'
+    entries = []
+    offset = HEADER.size + ENTRY.size * len(tables)
+    for name, table in tables.items():
+        offset += -offset % ALIGNMENT
+        entries.append((name, table, offset))
+        offset += len(table) * array(getTypecode(table)).itemsize
+
+    tempPath = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        with open(tempPath, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, FORMAT_VERSION, tableVersion, byteOrder, len(tables)))
+            for name, table, offset in entries:
+                file.write(ENTRY.pack(name.encode(), getTypecode(table).encode(), offset, len(table)))
+            for name, table, offset in entries:
+                file.write(bytes(offset - file.tell()))
+                file.write(table)
+        os.replace(tempPath, path)
+    finally:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+
+def loadTables(path, tableVersion):
+    # Maps the file at path read-only and returns a dictionary of table name to memoryview
+    # The memoryviews index like the arrays that were written
+    # Returns None if the file is missing, was written by another version or on a machine with another byte order,
+    # or is damaged (a table past the end of the file, or an unknown typecode)
+
+    try:
+        file = open(path, 'rb')
+    except OSError:
+        return None
+    with file:
+        size = os.fstat(file.fileno()).st_size
+        if size < HEADER.size:
+            return None
+        data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    (magic, formatVersion, fileTableVersion, byteOrder, count) = HEADER.unpack_from(data, 0)
+    expectedByteOrder = b'<' if sys.byteorder == 'little' else b'>'
+    if magic != MAGIC or formatVersion != FORMAT_VERSION or fileTableVersion != tableVersion or byteOrder != expectedByteOrder:
+        data.close()
+        return None
+    if size < HEADER.size + ENTRY.size * count:
+        data.close()
+        return None
+
+    view = memoryview(data)
+    tables = {}
+    try:
+        for i in range(count):
+            (name, typecode, offset, length) = ENTRY.unpack_from(data, HEADER.size + ENTRY.size * i)
+            typecode = typecode.decode()
+            end = offset + length * array(typecode).itemsize
+            if end > size:
+                raise ValueError("Table %r runs past the end of the file" % name)
+            tables[name.rstrip(b'\0').decode()] = view[offset : end].cast(typecode)
+    except ValueError:
+        # The map can only be closed once nothing is viewing it
+        releaseTables(tables)
+        view.release()
+        data.close()
+        return None
+    return tables
+
+def releaseTables(tables):
+    # Releases the memoryviews returned by loadTables--the file is unmapped once none are left
+    for table in tables.values():
+        table.release()
+
+
+if __name__ == '__main__':
+    import RubiksCubeTwoPhase
+    import time
+
+    path = sys.argv[1] if len(sys.argv) > 1 else RubiksCubeTwoPhase.getTablesPath()
+    start = time.perf_counter()
+    tables = RubiksCubeTwoPhase.buildTables()
+    writeTables(path, tables, RubiksCubeTwoPhase.TABLE_VERSION)
+    print("Wrote %d tables to %s in %.1f seconds" % (len(tables), path, time.perf_counter() - start))
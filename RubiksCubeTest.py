@@ -1,6 +1,8 @@
-from DisplayRubiksCube import *
 from RubiksCube import *
 from RubiksCubeUtil import *
+from time import sleep
+
+showAnimation = True
 
 stateStrs = []
 stateStrs.append("rbwyywogr yryorygyg bgbogoybw orwwowgyb grbrbbrgy rboowwwgo")
@@ -8,10 +10,110 @@ stateStrs.append("wbwrwrygr goyygywwg bbrbrbywy bobwbybrg owrgoowro googygryo")
 stateStrs.append("ywygrwrww wbogwbwbg ggrrgbwgo gobyyryog robybryrb oorwoyoyb")
 stateStrs.append("ygrrywyoo bwwgbwyrg bgbrrywbr wyrogrboo gbogoowyg oyrbwwgby")
 stateStrs.append("oyryowboy obgrworyo ogbwbwwrr wrwbyyboy bbyggbggw gogrrwrgy")
+
+# Checks--each returns True if it passes
+
+def verifyVirtualTurns(stateStr):
+    # With virtual rotations, a whole-cube turn leaves the squares as held unchanged (no gather),
+    # while the cube as seen matches one that really turns
+    virtual = RubiksCube(parseCompactState(stateStr))
+    virtual.setVirtualRotations(True)
+    real = RubiksCube(parseCompactState(stateStr))
+    for action in [Action.TCW, Action.R, Action.TF, Action.U2, Action.TCCW, Action.FP, Action.TB, Action.TB, Action.D]:
+        held = virtual.getPhysicalCompactState()
+        virtual.performAction(action)
+        real.performAction(action)
+        if action in turnActions and virtual.getPhysicalCompactState() is not held:
+            return False
+        if virtual.getCompactState() != real.getCompactState() or virtual.getState() != real.getState():
+            return False
+        if virtual.findCorner(RubiksColor.WHITE, RubiksColor.BLUE, RubiksColor.ORANGE) != real.findCorner(RubiksColor.WHITE, RubiksColor.BLUE, RubiksColor.ORANGE):
+            return False
+    
+    # The recorded face moves, done to the cube as held, give the squares as held
+    replay = RubiksCube(parseCompactState(stateStr))
+    for action in virtual.getMoveHistory():
+        replay.performAction(action)
+    return replay.getCompactState() == virtual.getPhysicalCompactState()
+
+class StandInDisplay:
+    # Display for ReplayPlayer that keeps the state it shows instead of drawing it, taking delay seconds per move
+    def __init__(self, delay):
+        self.delay = delay
+        self.state = None
+    
+    def showState(self, compactState):
+        self.state = bytes(compactState)
+    
+    def setSpeed(self, speed):
+        pass
+    
+    def animateAction(self, action):
+        sleep(self.delay)
+        self.state = bytes(actionGathers[action](self.state))
+
+def verifyPlayerSeekToEnd(stateStr):
+    # Seeking a playing ReplayPlayer to the end or past it, between moves or during one, finishes the replay
+    from RubiksCubePlayer import ReplayPlayer
+    startState = parseCompactState(stateStr)
+    moves = [Action.R, Action.U, Action.RP, Action.UP, Action.F2, Action.TCW]
+    endState = startState
+    for action in moves:
+        endState = bytes(actionGathers[action](endState))
+    for position in [len(moves), len(moves) + 3]:
+        for delay in [0, 0.2]:
+            display = StandInDisplay(delay)
+            player = ReplayPlayer(display, startState, moves)
+            player.start()
+            sleep(0.05)
+            player.seek(position)
+            finished = player.waitUntilFinished(5)
+            playing = player.isPlaying()
+            player.stop()
+            if not finished or playing or player.getPosition() != len(moves) or display.state != endState:
+                return False
+    return True
+
+def verifyValidator(stateStr):
+    # Checks validateCompactState on a legal cube, and on cubes no real cube can be
+    from RubiksCubeCubies import validateCompactState
+    legal = parseCompactState(stateStr)
+    solved = stateToCompact(stateSolved())
+    
+    # Mirror image of the solved cube: the right and left faces swapped, centers and all
+    mirrored = bytearray(solved)
+    mirrored[Faces.RIGHT.value*9 : Faces.RIGHT.value*9 + 9] = solved[Faces.LEFT.value*9 : Faces.LEFT.value*9 + 9]
+    mirrored[Faces.LEFT.value*9 : Faces.LEFT.value*9 + 9] = solved[Faces.RIGHT.value*9 : Faces.RIGHT.value*9 + 9]
+    
+    # Only the right and left centers swapped
+    swappedCenters = bytearray(solved)
+    (right, left) = (getIndex(Faces.RIGHT, 1, 1), getIndex(Faces.LEFT, 1, 1))
+    (swappedCenters[right], swappedCenters[left]) = (solved[left], solved[right])
+    
+    # One corner twisted in place
+    twisted = bytearray(solved)
+    corner = [getIndex(Faces.TOP, 2, 2), getIndex(Faces.RIGHT, 0, 0), getIndex(Faces.FRONT, 0, 2)]
+    (twisted[corner[0]], twisted[corner[1]], twisted[corner[2]]) = (solved[corner[1]], solved[corner[2]], solved[corner[0]])
+    
+    if validateCompactState(legal) != None or validateCompactState(solved) != None:
+        return False
+    return all([validateCompactState(bytes(state)) != None for state in [mirrored, swappedCenters, twisted]])
+
+print("Virtual turns leave the squares as held unchanged" if verifyVirtualTurns(stateStrs[1].replace(' ', '')) else "Virtual turns DO NOT leave the squares as held unchanged")
+print("Seeking the replay to the end finishes it" if verifyPlayerSeekToEnd(stateStrs[1].replace(' ', '')) else "Seeking the replay to the end DOES NOT finish it")
+print("The validator accepts legal cubes and rejects illegal ones" if verifyValidator(stateStrs[1].replace(' ', '')) else "The validator DOES NOT tell legal cubes from illegal ones")
+
 stateStr = stateStrs[0].replace(' ', '')
 cube = RubiksCube(parseRubiksCubeState(stateStr))
-display = DisplayRubiksCube(cube)
+startState = cube.getCompactState()
 cube.solve()
-print("Complete! Enter 'stop' to end program.")
-while input("") != "stop":
-    pass
\ No newline at end of file
+print("Complete!")
+if showAnimation:
+    # The solve is done first, then its moves are replayed on a display of their own (see RubiksCubePlayer)
+    from RubiksCubePlayer import ReplayPlayer
+    player = ReplayPlayer(RubiksCube(startState).createDisplay(attach = False), startState, cube.getMoveHistory())
+    player.start()
+    print("Enter 'stop' to end program.")
+    while input("") != "stop":
+        pass
+    player.stop()
\ No newline at end of file
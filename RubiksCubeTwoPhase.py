@@ -0,0 +1,410 @@
+# Two-phase solver (Kociemba's algorithm)
+    # Phase 1 brings the cube into the subgroup generated by U, D, R2, L2, F2, B2:
+        # every piece oriented, and the four middle-row edges somewhere in the middle row
+    # Phase 2 solves the cube using only those moves
+    # Both phases are IDA* searches over coordinates (small integers describing part of the cube),
+    # guided by pruning tables that give a lower bound on the moves needed for pairs of coordinates
+    # Usually finds solutions of around 20-25 moves, versus over 100 for RubiksCube.solve
+
+from RubiksCubeUtil import *
+from RubiksCubeCubies import *
+from RubiksCubeTables import loadTables, writeTables, releaseTables
+from array import array
+import os
+import time
+
+# The 18 moves: each face (in this order) turned a quarter clockwise, half, and a quarter counterclockwise
+# Move index = 3*face index + (quarter turns - 1)
+moveFaces = [Faces.TOP, Faces.RIGHT, Faces.FRONT, Faces.BOTTOM, Faces.LEFT, Faces.BACK]
+faceActions = {
+    Faces.TOP : (Action.U, Action.U2, Action.UP),
+    Faces.RIGHT : (Action.R, Action.R2, Action.RP),
+    Faces.FRONT : (Action.F, Action.F2, Action.FP),
+    Faces.BOTTOM : (Action.D, Action.D2, Action.DP),
+    Faces.LEFT : (Action.L, Action.L2, Action.LP),
+    Faces.BACK : (Action.B, Action.B2, Action.BP)
+}
+# moveIndexActions[move index] is the Action of that move
+moveIndexActions = [action for face in moveFaces for action in faceActions[face]]
+
+# Moves allowed in phase 2 (indices into the 18 moves)
+phase2Moves = [0, 1, 2, 4, 7, 9, 10, 11, 13, 16]
+
+# Sizes of the coordinates
+N_TWIST = 2187          # 3^7 corner twists
+N_FLIP = 2048           # 2^11 edge flips
+N_SLICE = 495           # 12 choose 4 places for the middle-row edges
+N_CORNER_PERM = 40320   # 8! corner permutations
+N_UD_EDGE_PERM = 40320  # 8! permutations of the top and bottom edges (phase 2 only)
+N_SLICE_PERM = 24       # 4! permutations of the middle-row edges (phase 2 only)
+
+# Longest possible phase 1 and phase 2 solutions
+MAX_PHASE1 = 12
+MAX_PHASE2 = 18
+
+
+# Coordinates
+
+def binomial(n, k):
+    if k < 0 or k > n:
+        return 0
+    result = 1
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+    return result
+
+def getPermutationIndex(permutation):
+    # Index (0 to n! - 1) of a permutation of 0..n-1--the identity is 0
+    permutation = list(permutation)
+    index = 0
+    for j in range(len(permutation) - 1, 0, -1):
+        k = 0
+        while permutation[j] != j:
+            permutation[:j + 1] = permutation[1:j + 1] + permutation[:1]
+            k += 1
+        index = (j + 1) * index + k
+    return index
+
+def getPermutationFromIndex(index, n):
+    # Inverse of getPermutationIndex
+    permutation = list(range(n))
+    for j in range(n):
+        k = index % (j + 1)
+        index //= j + 1
+        for _ in range(k):
+            permutation[:j + 1] = permutation[j:j + 1] + permutation[:j]
+    return permutation
+
+def getTwist(cubies):
+    twist = 0
+    for i in range(7):
+        twist = 3*twist + cubies.co[i]
+    return twist
+
+def setTwist(cubies, twist):
+    total = 0
+    for i in range(6, -1, -1):
+        cubies.co[i] = twist % 3
+        total += cubies.co[i]
+        twist //= 3
+    cubies.co[7] = (3 - total % 3) % 3
+
+def getFlip(cubies):
+    flip = 0
+    for i in range(11):
+        flip = 2*flip + cubies.eo[i]
+    return flip
+
+def setFlip(cubies, flip):
+    total = 0
+    for i in range(10, -1, -1):
+        cubies.eo[i] = flip % 2
+        total += cubies.eo[i]
+        flip //= 2
+    cubies.eo[11] = total % 2
+
+def getSlice(cubies):
+    # Which 4 positions hold the middle-row edges (FR, FL, BL, BR)--0 when they are in the middle row
+    slice = 0
+    found = 0
+    for position in range(11, -1, -1):
+        if cubies.ep[position] >= Edges.FR.value:
+            slice += binomial(11 - position, found + 1)
+            found += 1
+    return slice
+
+def setSlice(cubies, slice):
+    # Puts the middle-row edges in the positions given by slice, and the other edges in order elsewhere
+    middleEdges = [Edges.FR.value, Edges.FL.value, Edges.BL.value, Edges.BR.value]
+    otherEdges = [edge for edge in range(12) if edge not in middleEdges]
+    cubies.ep = [-1]*12
+    remaining = 4
+    for position in range(12):
+        if remaining > 0 and slice >= binomial(11 - position, remaining):
+            cubies.ep[position] = middleEdges[4 - remaining]
+            slice -= binomial(11 - position, remaining)
+            remaining -= 1
+    for position in range(12):
+        if cubies.ep[position] == -1:
+            cubies.ep[position] = otherEdges.pop(0)
+
+def getCornerPerm(cubies):
+    return getPermutationIndex(cubies.cp)
+
+def setCornerPerm(cubies, cornerPerm):
+    cubies.cp = getPermutationFromIndex(cornerPerm, 8)
+
+def getUDEdgePerm(cubies):
+    # Only meaningful in phase 2, when the top and bottom edges are all in the top and bottom rows
+    return getPermutationIndex(cubies.ep[:8])
+
+def setUDEdgePerm(cubies, udEdgePerm):
+    cubies.ep[:8] = getPermutationFromIndex(udEdgePerm, 8)
+
+def getSlicePerm(cubies):
+    # Only meaningful in phase 2, when the middle-row edges are all in the middle row
+    return getPermutationIndex([edge - Edges.FR.value for edge in cubies.ep[8:]])
+
+def setSlicePerm(cubies, slicePerm):
+    cubies.ep[8:] = [edge + Edges.FR.value for edge in getPermutationFromIndex(slicePerm, 4)]
+
+
+# Tables
+
+def getMoveCubies():
+    # The 18 moves as CubieCubes, built from the action permutations of RubiksCube
+    from RubiksCube import actionPermutations
+    return [getCubieMove(actionPermutations[action]) for action in moveIndexActions]
+
+def buildMoveTable(size, getCoordinate, setCoordinate, moveCubies, multiply):
+    # table[len(moveCubies)*coordinate + move] is the coordinate after the move
+    table = array('H', bytes(2 * size * len(moveCubies)))
+    cubies = CubieCube()
+    index = 0
+    for coordinate in range(size):
+        setCoordinate(cubies, coordinate)
+        for move in moveCubies:
+            movedCubies = cubies.copy()
+            multiply(movedCubies, move)
+            table[index] = getCoordinate(movedCubies)
+            index += 1
+    return table
+
+def buildPruningTable(moveTable1, size1, moveTable2, size2, numberOfMoves):
+    # Breadth-first search from the solved coordinates (both 0) over pairs of coordinates
+    # table[size2*coordinate1 + coordinate2] is the fewest moves that bring both coordinates to 0
+    table = bytearray(b'\xff') * (size1 * size2)
+    table[0] = 0
+    frontier = [0]
+    depth = 0
+    while len(frontier) > 0:
+        depth += 1
+        nextFrontier = []
+        for index in frontier:
+            (coordinate1, coordinate2) = divmod(index, size2)
+            row1 = moveTable1[numberOfMoves*coordinate1 : numberOfMoves*(coordinate1 + 1)]
+            row2 = moveTable2[numberOfMoves*coordinate2 : numberOfMoves*(coordinate2 + 1)]
+            for moved1, moved2 in zip(row1, row2):
+                movedIndex = size2*moved1 + moved2
+                if table[movedIndex] == 255:
+                    table[movedIndex] = depth
+                    nextFrontier.append(movedIndex)
+        frontier = nextFrontier
+    return table
+
+def buildTables():
+    # Builds all tables used by the solver--takes a while, see getTables
+    # Returns a dictionary of table name to array
+    moveCubies = getMoveCubies()
+    phase2MoveCubies = [moveCubies[move] for move in phase2Moves]
+
+    tables = {}
+
+    # Phase 1 move tables--18 entries per coordinate
+    tables['twistMove'] = buildMoveTable(N_TWIST, getTwist, setTwist, moveCubies, CubieCube.cornerMultiply)
+    tables['flipMove'] = buildMoveTable(N_FLIP, getFlip, setFlip, moveCubies, CubieCube.edgeMultiply)
+    tables['sliceMove'] = buildMoveTable(N_SLICE, getSlice, setSlice, moveCubies, CubieCube.edgeMultiply)
+
+    # Phase 2 move tables--one entry per phase 2 move per coordinate
+    tables['cornerPermMove'] = buildMoveTable(N_CORNER_PERM, getCornerPerm, setCornerPerm, phase2MoveCubies, CubieCube.cornerMultiply)
+    tables['udEdgePermMove'] = buildMoveTable(N_UD_EDGE_PERM, getUDEdgePerm, setUDEdgePerm, phase2MoveCubies, CubieCube.edgeMultiply)
+    tables['slicePermMove'] = buildMoveTable(N_SLICE_PERM, getSlicePerm, setSlicePerm, phase2MoveCubies, CubieCube.edgeMultiply)
+
+    # Pruning tables
+    tables['sliceTwistPrune'] = buildPruningTable(tables['sliceMove'], N_SLICE, tables['twistMove'], N_TWIST, 18)
+    tables['sliceFlipPrune'] = buildPruningTable(tables['sliceMove'], N_SLICE, tables['flipMove'], N_FLIP, 18)
+    tables['slicePermCornerPermPrune'] = buildPruningTable(tables['slicePermMove'], N_SLICE_PERM, tables['cornerPermMove'], N_CORNER_PERM, len(phase2Moves))
+    tables['slicePermUDEdgePermPrune'] = buildPruningTable(tables['slicePermMove'], N_SLICE_PERM, tables['udEdgePermMove'], N_UD_EDGE_PERM, len(phase2Moves))
+
+    return tables
+
+# Identifies the contents of the tables in the cache file--change whenever buildTables changes
+TABLE_VERSION = 1
+
+# The number of items in each table buildTables makes--a cache file without all of them is built again
+tableSizes = {
+    'twistMove' : 18 * N_TWIST,
+    'flipMove' : 18 * N_FLIP,
+    'sliceMove' : 18 * N_SLICE,
+    'cornerPermMove' : len(phase2Moves) * N_CORNER_PERM,
+    'udEdgePermMove' : len(phase2Moves) * N_UD_EDGE_PERM,
+    'slicePermMove' : len(phase2Moves) * N_SLICE_PERM,
+    'sliceTwistPrune' : N_SLICE * N_TWIST,
+    'sliceFlipPrune' : N_SLICE * N_FLIP,
+    'slicePermCornerPermPrune' : N_SLICE_PERM * N_CORNER_PERM,
+    'slicePermUDEdgePermPrune' : N_SLICE_PERM * N_UD_EDGE_PERM
+}
+
+def getTablesPath():
+    # Path of the cache file--set RUBIKS_CUBE_TABLES to override
+    return os.environ.get('RUBIKS_CUBE_TABLES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'RubiksCubeTwoPhase.tables'))
+
+_tables = None
+
+def getTables():
+    # Returns the solver's tables
+    # Maps them from the cache file if it is there with every table, otherwise builds them and tries to write the cache file
+    global _tables
+    if _tables == None:
+        path = getTablesPath()
+        _tables = loadTables(path, TABLE_VERSION)
+        if _tables != None and any(name not in _tables or len(_tables[name]) != size for name, size in tableSizes.items()):
+            releaseTables(_tables)
+            _tables = None
+        if _tables == None:
+            _tables = buildTables()
+            try:
+                writeTables(path, _tables, TABLE_VERSION)
+            except OSError:
+                # e.g. a read-only directory--the tables are still usable, just not cached
+                pass
+    return _tables
+
+
+# Search
+
+def getAllowedMoves(moves, lastFace):
+    # Moves (from the given list of move indices) that may follow a move of lastFace (index into moveFaces, 6 for none)
+    # Skips moves of the same face, and of the opposite face in one of the two orders since they commute
+    # With no last move, every move is allowed (6 - 3 would otherwise rule out the bottom face)
+    if lastFace == 6:
+        return list(moves)
+    return [move for move in moves if move // 3 != lastFace and move // 3 != lastFace - 3]
+
+phase1AllowedMoves = [getAllowedMoves(range(18), lastFace) for lastFace in range(7)]
+phase2AllowedMoves = [[(index, move) for index, move in enumerate(phase2Moves) if move in getAllowedMoves(phase2Moves, lastFace)] for lastFace in range(7)]
+
+class TwoPhaseSearch:
+
+    '''
+    State of one two-phase solve
+    Keeps the best solution found so far, and keeps looking for shorter ones
+    until one has at most maxLength moves or timeout seconds have passed
+    '''
+
+    def __init__(self, cubies, maxLength, timeout):
+        self._tables = getTables()
+        self._moveCubies = getMoveCubies()
+        self._cubies = cubies
+        self._maxLength = maxLength
+        self._deadline = time.perf_counter() + timeout
+        self._moves = []
+        self._bestMoves = None
+
+    def run(self):
+        # Returns the best solution found as a list of move indices, or None
+        tables = self._tables
+        twist = getTwist(self._cubies)
+        flip = getFlip(self._cubies)
+        slice = getSlice(self._cubies)
+        minimum = max(tables['sliceTwistPrune'][N_TWIST*slice + twist], tables['sliceFlipPrune'][N_FLIP*slice + flip])
+        for depth in range(minimum, MAX_PHASE1 + 1):
+            if self.searchPhase1(twist, flip, slice, depth, 6):
+                break
+        return self._bestMoves
+
+    def isDone(self):
+        if self._bestMoves == None:
+            return False
+        return len(self._bestMoves) <= self._maxLength or time.perf_counter() > self._deadline
+
+    def searchPhase1(self, twist, flip, slice, togo, lastFace):
+        # Returns True when the whole search is done
+        if togo == 0:
+            # If the last move was a phase 2 move, the cube was already in phase 2 one move earlier,
+            # and that shorter phase 1 solution has been tried
+            if len(self._moves) > 0 and self._moves[-1] in phase2Moves:
+                return False
+            return self.startPhase2()
+
+        tables = self._tables
+        twistMove = tables['twistMove']
+        flipMove = tables['flipMove']
+        sliceMove = tables['sliceMove']
+        sliceTwistPrune = tables['sliceTwistPrune']
+        sliceFlipPrune = tables['sliceFlipPrune']
+        for move in phase1AllowedMoves[lastFace]:
+            newTwist = twistMove[18*twist + move]
+            newFlip = flipMove[18*flip + move]
+            newSlice = sliceMove[18*slice + move]
+            if sliceTwistPrune[N_TWIST*newSlice + newTwist] >= togo or sliceFlipPrune[N_FLIP*newSlice + newFlip] >= togo:
+                continue
+            self._moves.append(move)
+            if self.searchPhase1(newTwist, newFlip, newSlice, togo - 1, move // 3):
+                return True
+            self._moves.pop()
+        return False
+
+    def startPhase2(self):
+        # Called at the end of each phase 1 solution; returns True when the whole search is done
+        tables = self._tables
+        cubies = self._cubies.copy()
+        for move in self._moves:
+            cubies.multiply(self._moveCubies[move])
+        cornerPerm = getCornerPerm(cubies)
+        udEdgePerm = getUDEdgePerm(cubies)
+        slicePerm = getSlicePerm(cubies)
+
+        maxDepth = MAX_PHASE2
+        if self._bestMoves != None:
+            maxDepth = min(maxDepth, len(self._bestMoves) - 1 - len(self._moves))
+        minimum = max(tables['slicePermCornerPermPrune'][N_CORNER_PERM*slicePerm + cornerPerm], tables['slicePermUDEdgePermPrune'][N_UD_EDGE_PERM*slicePerm + udEdgePerm])
+        lastFace = self._moves[-1] // 3 if len(self._moves) > 0 else 6
+        phase1Length = len(self._moves)
+        for depth in range(minimum, maxDepth + 1):
+            if self.searchPhase2(cornerPerm, udEdgePerm, slicePerm, depth, lastFace):
+                self._bestMoves = list(self._moves)
+                del self._moves[phase1Length:]
+                break
+        return self.isDone()
+
+    def searchPhase2(self, cornerPerm, udEdgePerm, slicePerm, togo, lastFace):
+        # Returns True when solved
+        if togo == 0:
+            return True
+
+        tables = self._tables
+        cornerPermMove = tables['cornerPermMove']
+        udEdgePermMove = tables['udEdgePermMove']
+        slicePermMove = tables['slicePermMove']
+        cornerPermPrune = tables['slicePermCornerPermPrune']
+        udEdgePermPrune = tables['slicePermUDEdgePermPrune']
+        numberOfMoves = len(phase2Moves)
+        for index, move in phase2AllowedMoves[lastFace]:
+            newCornerPerm = cornerPermMove[numberOfMoves*cornerPerm + index]
+            newUDEdgePerm = udEdgePermMove[numberOfMoves*udEdgePerm + index]
+            newSlicePerm = slicePermMove[numberOfMoves*slicePerm + index]
+            if cornerPermPrune[N_CORNER_PERM*newSlicePerm + newCornerPerm] >= togo or udEdgePermPrune[N_UD_EDGE_PERM*newSlicePerm + newUDEdgePerm] >= togo:
+                continue
+            self._moves.append(move)
+            if self.searchPhase2(newCornerPerm, newUDEdgePerm, newSlicePerm, togo - 1, move // 3):
+                return True
+            self._moves.pop()
+        return False
+
+def solveTwoPhase(compactState, maxLength = 22, timeout = 5):
+    # Returns a list of actions (from Action Enum) that solves the cube, or None if it can't be solved
+    # Stops at the first solution of at most maxLength moves, or returns the shortest one found after timeout seconds
+    # (keeps going past timeout until it has found one)
+    cubies = compactToCubies(compactState)
+    if cubies == None or not cubies.isSolvable():
+        return None
+    moves = TwoPhaseSearch(cubies, maxLength, timeout).run()
+    if moves == None:
+        return None
+    return [moveIndexActions[move] for move in moves]
+
+def verifySingleMoves():
+    # Checks that a cube scrambled by any one move is solved in one move--returns True if they all are
+    # Asks for maxLength 1, since a longer solution within maxLength can be found first (e.g. R then 7 phase 2 moves for R')
+    from RubiksCube import actionGathers
+    solved = stateToCompact(stateSolved())
+    for action in moveIndexActions:
+        moves = solveTwoPhase(bytes(actionGathers[action](solved)), maxLength = 1)
+        if moves == None or len(moves) != 1:
+            return False
+    return True
+
+
+if __name__ == '__main__':
+    print("Single moves are solved in one move" if verifySingleMoves() else "Single moves are NOT solved in one move")
@@ -1,4 +1,5 @@
 from enum import Enum
+from operator import itemgetter
 
 class RubiksColor(Enum):
     RED = 0
@@ -25,6 +26,12 @@ class Action(Enum):
     FP = 13     # Move front face counterlockwise
     B = 14      # Move back face clockwise
     BP = 15     # Move back face counterlockwise
+    U2 = 16     # Move upper face 180 degrees
+    D2 = 17     # Move down face 180 degrees
+    R2 = 18     # Move right face 180 degrees
+    L2 = 19     # Move left face 180 degrees
+    F2 = 20     # Move front face 180 degrees
+    B2 = 21     # Move back face 180 degrees
 class Faces(Enum):
     TOP = 0
     FRONT = 1
@@ -46,9 +53,114 @@ moveActions = [
     Action.RP,
     Action.LP,
     Action.FP,
-    Action.BP
+    Action.BP,
+    Action.U2,
+    Action.D2,
+    Action.R2,
+    Action.L2,
+    Action.F2,
+    Action.B2
 ]
 
+# Each half turn and the clockwise move it does twice
+halfTurnActions = {
+    Action.U2 : Action.U,
+    Action.D2 : Action.D,
+    Action.R2 : Action.R,
+    Action.L2 : Action.L,
+    Action.F2 : Action.F,
+    Action.B2 : Action.B
+}
+
+# Whole-cube turns
+turnActions = [Action.TCW, Action.TCCW, Action.TF, Action.TB]
+
+# Action that undoes each action
+inverseActions = {
+    Action.TCW : Action.TCCW,
+    Action.TCCW : Action.TCW,
+    Action.TF : Action.TB,
+    Action.TB : Action.TF,
+    Action.U : Action.UP,
+    Action.UP : Action.U,
+    Action.D : Action.DP,
+    Action.DP : Action.D,
+    Action.R : Action.RP,
+    Action.RP : Action.R,
+    Action.L : Action.LP,
+    Action.LP : Action.L,
+    Action.F : Action.FP,
+    Action.FP : Action.F,
+    Action.B : Action.BP,
+    Action.BP : Action.B,
+    Action.U2 : Action.U2,
+    Action.D2 : Action.D2,
+    Action.R2 : Action.R2,
+    Action.L2 : Action.L2,
+    Action.F2 : Action.F2,
+    Action.B2 : Action.B2
+}
+
+# Face turned by each action besides whole-cube turns
+actionFaces = {
+    Action.U : Faces.TOP,
+    Action.UP : Faces.TOP,
+    Action.D : Faces.BOTTOM,
+    Action.DP : Faces.BOTTOM,
+    Action.R : Faces.RIGHT,
+    Action.RP : Faces.RIGHT,
+    Action.L : Faces.LEFT,
+    Action.LP : Faces.LEFT,
+    Action.F : Faces.FRONT,
+    Action.FP : Faces.FRONT,
+    Action.B : Faces.BACK,
+    Action.BP : Faces.BACK,
+    Action.U2 : Faces.TOP,
+    Action.D2 : Faces.BOTTOM,
+    Action.R2 : Faces.RIGHT,
+    Action.L2 : Faces.LEFT,
+    Action.F2 : Faces.FRONT,
+    Action.B2 : Faces.BACK
+}
+
+oppositeFaces = {
+    Faces.TOP : Faces.BOTTOM,
+    Faces.BOTTOM : Faces.TOP,
+    Faces.FRONT : Faces.BACK,
+    Faces.BACK : Faces.FRONT,
+    Faces.RIGHT : Faces.LEFT,
+    Faces.LEFT : Faces.RIGHT
+}
+
+# Doing one of these twice is the same as doing its inverse twice
+counterClockwiseActions = [Action.TCCW, Action.TB, Action.UP, Action.DP, Action.RP, Action.LP, Action.FP, Action.BP]
+
+def isRedundantAction(action, previousAction = None, secondPreviousAction = None):
+    # Checks if doing action right after previousAction (and secondPreviousAction) is never needed in a shortest move sequence
+    # Used by the lookahead search to skip sequences that are equivalent to shorter or already-tried ones
+    if previousAction == None:
+        return False
+    
+    # Two moves of the same face are the same as one move (or none), since there are half turns
+    face = actionFaces.get(action)
+    previousFace = actionFaces.get(previousAction)
+    if face != None and face == previousFace:
+        return True
+    
+    # Undoes the previous action
+    if action == inverseActions[previousAction]:
+        return True
+    
+    # Three turns in a row is the inverse, and two counterclockwise is the same as two clockwise
+    if action == previousAction and (action == secondPreviousAction or action in counterClockwiseActions):
+        return True
+    
+    # Moves of opposite faces commute--only try them in one order
+    if face != None and previousFace == oppositeFaces[face] and face.value < previousFace.value:
+        return True
+    
+    return False
+
 def getOrientationMapping(origin, destination):
     # Function to define orientation differences between two faces' coordinate systems
     # Used during any move to know the coordinates on a new face for shifted squares
@@ -135,6 +247,11 @@ def stateCopy(state):
 
 def stateDefault():
     return [[[RubiksColor.DEFAULT for _ in range(3)] for _ in range(3)] for _ in range(6)]
+
+def stateSolved():
+    # Solved state in the orientation the solver uses: white on top, blue in front
+    faceColors = [RubiksColor.WHITE, RubiksColor.BLUE, RubiksColor.ORANGE, RubiksColor.GREEN, RubiksColor.RED, RubiksColor.YELLOW]
+    return [[[faceColors[face] for _ in range(3)] for _ in range(3)] for face in range(6)]
     
 def getRotationMapping(counterClockwise = False):
     # Returns a mapping of a simple rotation (clockwise by default)
@@ -160,6 +277,71 @@ def getPointsInCol(col):
 def getAllPoints():
     return [(row, col) for row in range(3) for col in range(3)]
 
+def getIndex(face, row, col):
+    # Index of a square in the flat ordering of a state (face, then row, then col)
+    return face.value*9 + row*3 + col
+
+# Compact state: bytes of 54 color codes (RubiksColor values), in the flat order given by getIndex
+# Immutable and hashable, so it can be used as a dictionary key
+colorsByCode = tuple(RubiksColor)
+
+def stateToCompact(state):
+    # Converts a Color[3][3][6] state to a compact state
+    return bytes([state[face][row][col].value for face in range(6) for row in range(3) for col in range(3)])
+
+def compactToState(compactState):
+    # Converts a compact state back to a Color[3][3][6] state
+    return [[[colorsByCode[compactState[face*9 + row*3 + col]] for col in range(3)] for row in range(3)] for face in range(6)]
+
+def compileDesiredState(desiredState):
+    # Compiles a desired state (DEFAULT means don't-care) into an (indices, target) pair
+    # A compact state is the desired state exactly when getSquaresGetter(indices)(compactState) == target
+    indices = [getIndex(face, row, col) for face in Faces for row in range(3) for col in range(3) if desiredState[face.value][row][col] != RubiksColor.DEFAULT]
+    target = tuple([desiredState[index // 9][index // 3 % 3][index % 3].value for index in indices])
+    return (indices, target)
+
+def getSquaresGetter(indices):
+    # Returns a function that gets the tuple of squares at the given flat indices from a compact state
+    if len(indices) == 0:
+        return lambda compactState: ()
+    if len(indices) == 1:
+        index = indices[0]
+        return lambda compactState: (compactState[index],)
+    return itemgetter(*indices)
+
+# Flat indices of the corner, edge, and center squares
+# Moves and whole-cube turns only ever move a square to another square of the same kind
+squareKinds = [
+    [index for index in range(54) if index % 9 in (0, 2, 6, 8)],
+    [index for index in range(54) if index % 9 in (1, 3, 5, 7)],
+    [index for index in range(54) if index % 9 == 4]
+]
+
+def compileGoalKey(indices, target):
+    # Given a goal from compileDesiredState, returns a function giving a key for a compact state
+    # If two states have the same key, any sequence of actions reaches the goal from both or from neither,
+    # so a search from either finds the same moves
+    # The key keeps each square only if its color is wanted somewhere on that kind of square--the rest become DEFAULT
+    getters = []
+    for kind in squareKinds:
+        wanted = set([code for index, code in zip(indices, target) if index in kind])
+        table = bytes([code if code in wanted else RubiksColor.DEFAULT.value for code in range(256)])
+        if len(wanted) > 0:
+            getters.append((getSquaresGetter(kind), table))
+    return lambda compactState: b''.join([bytes(getter(compactState)).translate(table) for getter, table in getters])
+
+def compilePermutation(transformations):
+    # Flattens a list of transformations into a single permutation of the 54 flat indices
+    # permutation[i] is the index of the square that moves into index i
+    permutation = list(range(54))
+    for origin, destination, points, mapping in transformations:
+        if mapping == None:
+            mapping = getOrientationMapping(origin, destination)
+        for point in points:
+            coordsOfMappedPoint = mapping[point]
+            permutation[getIndex(destination, point[0], point[1])] = getIndex(origin, coordsOfMappedPoint[0], coordsOfMappedPoint[1])
+    return permutation
+
 def parseRubiksCubeState(stateStr):
     ''' Creates and returns a state object, given the state as a string
         The string must be formatted in this order:
@@ -170,6 +352,10 @@ def parseRubiksCubeState(stateStr):
         Each character should be the first letter of the square it represents
             'w', 'b', 'g', 'y', 'o', or 'r'
     '''
+    return compactToState(parseCompactState(stateStr))
+
+def parseCompactState(stateStr):
+    # Same as parseRubiksCubeState, but returns a compact state
     charToColor = {
         'w' : RubiksColor.WHITE,
         'b' : RubiksColor.BLUE,
@@ -179,14 +365,21 @@ def parseRubiksCubeState(stateStr):
         'r' : RubiksColor.RED
     }
     
-    state = [[[RubiksColor.DEFAULT for _ in range(3)] for _ in range(3)] for _ in range(6)]
+    # Raises ValueError if the string isn't 54 of those characters
+    if len(stateStr) != 54:
+        raise ValueError("The state has %d squares instead of 54" % len(stateStr))
+    for char in stateStr:
+        if char not in charToColor:
+            raise ValueError("'%s' isn't one of the color letters r, g, b, w, y, o" % char)
     
-    for face in range(6):
-        for row in range(3):
-            for col in range(3):
-                state[face][row][col] = charToColor[stateStr[face*9+row*3+col]]
-                
-    return state
+    return bytes([charToColor[char].value for char in stateStr])
+
+# Letter for each color code, for compactToStateString--'-' for DEFAULT
+colorLetters = 'rgbwyo-'
+
+def compactToStateString(compactState):
+    # The reverse of parseCompactState--returns the state as a string of color letters
+    return ''.join([colorLetters[code] for code in compactState])
 
 
 # def getRotatedFace(face, counterClockwise = False):
@@ -0,0 +1,62 @@
+# Headless command-line solver--no display, no prompts
+    # Reads state strings (see parseRubiksCubeState) one per line from a file or standard input,
+    # and writes one JSON record per cube (JSON Lines) to standard output or a file:
+        # {"index": 0, "state": "...", "success": true, "moves": ["U", "RP", ...], "moveCount": 21, "seconds": 0.03, "error": null}
+    # error says why a cube wasn't solved, e.g. what makes it an illegal cube
+    # index counts non-blank input lines from 0
+    # Input is streamed, so memory use stays flat however large the file is
+    # Usage:
+        # python SolveRubiksCubes.py [file] [--output file] [--workers N] [--method solve|twoPhase] [--unordered] [--no-rotations] [--optimize]
+            # [--max-nodes N] [--max-seconds S] [--max-moves N]
+
+from RubiksCubeBatch import iterSolveMany, solveMethods, addBudgetArguments, getBudget
+import argparse
+import json
+import sys
+
+def readStateStrs(inputFile, pending):
+    # Yields the non-blank lines of inputFile, remembering each in pending (index -> state string) until it is written
+    index = 0
+    for line in inputFile:
+        stateStr = line.strip()
+        if stateStr == '':
+            continue
+        pending[index] = stateStr
+        index += 1
+        yield stateStr
+
+def getRecord(index, stateStr, moves, seconds, problem):
+    return {
+        'index' : index,
+        'state' : stateStr,
+        'success' : moves != None,
+        'moves' : [] if moves == None else [action.name for action in moves],
+        'moveCount' : 0 if moves == None else len(moves),
+        'seconds' : round(seconds, 6),
+        'error' : problem
+    }
+
+def main(arguments = None):
+    parser = argparse.ArgumentParser(description = "Solve one cube per line of state strings, writing one JSON record per cube")
+    parser.add_argument('file', nargs = '?', help = "file of state strings (default: standard input)")
+    parser.add_argument('--output', '-o', help = "file to write records to (default: standard output)")
+    parser.add_argument('--workers', type = int, default = 1, help = "number of worker processes (default: 1, solve in this process)")
+    parser.add_argument('--method', choices = solveMethods, default = 'solve')
+    parser.add_argument('--unordered', action = 'store_true', help = "write records as cubes finish instead of in input order")
+    parser.add_argument('--no-rotations', action = 'store_true', help = "leave whole-cube turns out of the solutions")
+    parser.add_argument('--optimize', action = 'store_true', help = "shorten the solutions by merging moves")
+    addBudgetArguments(parser)
+    args = parser.parse_args(arguments)
+
+    inputFile = open(args.file) if args.file != None else sys.stdin
+    outputFile = open(args.output, 'w') if args.output != None else sys.stdout
+    pending = {}
+    with inputFile:
+        for index, moves, seconds, problem in iterSolveMany(readStateStrs(inputFile, pending), args.workers, args.method, ordered = not args.unordered, virtualRotations = args.no_rotations, optimize = args.optimize, budget = getBudget(args)):
+            outputFile.write(json.dumps(getRecord(index, pending.pop(index), moves, seconds, problem)) + '\n')
+            outputFile.flush()
+    if outputFile != sys.stdout:
+        outputFile.close()
+
+if __name__ == '__main__':
+    main()